@@ -0,0 +1,73 @@
+# analyzers/_ast_cache.py
+
+import os
+import sys
+import pickle
+import hashlib
+
+# Anchored to the project rather than the working directory; override with CODE_ARCH_CACHE_DIR
+CACHE_DIR = os.environ.get(
+    "CODE_ARCH_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".code_arch_cache")
+)
+# Bump whenever the fields extracted by CodeParser change so stale entries are ignored
+PARSER_VERSION = 2
+MAX_ENTRIES = 20000
+
+def content_hash(src_bytes):
+    return hashlib.sha256(src_bytes).hexdigest()
+
+def _cache_path(digest):
+    py_tag = "py{}{}".format(*sys.version_info[:2])
+    return os.path.join(CACHE_DIR, f"{digest}_{py_tag}_v{PARSER_VERSION}.pkl")
+
+def get(digest):
+    path = _cache_path(digest)
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated or incompatible pickles are just misses; drop them so the file is re-parsed and rewritten
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    try:
+        # mtime doubles as last-use time for prune()
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+def put(digest, data):
+    path = _cache_path(digest)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def prune(max_entries=MAX_ENTRIES):
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            entries = [(entry.stat().st_mtime, entry.path) for entry in it if entry.name.endswith(".pkl")]
+    except OSError:
+        return 0
+    if len(entries) <= max_entries:
+        return 0
+    entries.sort()
+    removed = 0
+    for _, path in entries[:len(entries) - max_entries]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -2,64 +2,150 @@
 
 import os
 import ast
+import logging
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from analyzers import _ast_cache
+
+logger = logging.getLogger(__name__)
+
+PARALLEL_MIN_FILES = 16
+PARSE_CHUNKSIZE = 32
+_BODY_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+_worker_archive = None
+
+class _Collector(ast.NodeVisitor):
+    def __init__(self):
+        self.functions, self.classes = [], []
+        self.imports = {"standard_imports": [], "from_imports": []}
+
+    def generic_visit(self, node):
+        # Defs and imports are statements, so expression subtrees never need visiting
+        for field in _BODY_FIELDS:
+            for child in getattr(node, field, ()):
+                self.visit(child)
+
+    def visit_FunctionDef(self, node):
+        self.functions.append({"name": node.name, "lineno": node.lineno, "end_lineno": getattr(node, "end_lineno", None)})
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.classes.append({"name": node.name, "lineno": node.lineno, "end_lineno": getattr(node, "end_lineno", None)})
+        self.generic_visit(node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports["standard_imports"].append({"module": alias.name, "alias": alias.asname, "line": node.lineno})
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            self.imports["from_imports"].append({
+                "module": node.module, "name": alias.name, "alias": alias.asname, "line": node.lineno
+            })
+
+def _init_archive_worker(zip_path):
+    # Pool workers open the archive once; the handle goes away with the worker when the pool shuts down
+    global _worker_archive
+    _worker_archive = zipfile.ZipFile(zip_path)
+
+def _parse_python_file(fpath, member=None, archive=None):
+    try:
+        if member is None:
+            with open(fpath, "rb") as f:
+                src = f.read()
+        else:
+            src = (archive or _worker_archive).read(member)
+        digest = _ast_cache.content_hash(src)
+        parse_data = _ast_cache.get(digest)
+        if parse_data is None:
+            node = ast.parse(src, filename=fpath)
+            collector = _Collector()
+            collector.visit(node)
+            parse_data = {
+                "parsing_successful": True,
+                "functions": collector.functions,
+                "classes": collector.classes,
+                "imports": collector.imports,
+                "source_lines": src.count(b"\n") + (1 if src and not src.endswith(b"\n") else 0)
+            }
+            _ast_cache.put(digest, parse_data)
+        imports = parse_data["imports"]
+        logger.debug(
+            "📄 %s: Parsed (%d funcs, %d classes, %d imports)",
+            os.path.basename(fpath), len(parse_data["functions"]), len(parse_data["classes"]),
+            len(imports["standard_imports"]) + len(imports["from_imports"])
+        )
+        parse_data["file_size"] = len(src)
+        parse_data["content_hash"] = digest
+        return parse_data
+    except Exception as e:
+        logger.error(
+            "❌ Failed to parse %s: %s\n"
+            "Resolution strategies:\n- Check syntax validity\n- Remove non-UTF8 chars\n- Check unsupported Python versions\n- Reduce file size\n- Test with simpler file",
+            fpath, e
+        )
+        return {"parsing_successful": False, "error": str(e)}
 
 class CodeParser:
     def __init__(self):
         print("🧩 CodeParser initialization complete.")
-        self.supported_ext = [".py"]
+        self.supported_ext = (".py",)
 
     def parse_project(self, root_dir):
         print(f"🔍 Parsing project in: {root_dir}")
         results = {"parsed_files": {}, "unsupported_files": []}
         try:
-            for dirpath, _, files in os.walk(root_dir):
-                for file in files:
-                    ext = os.path.splitext(file)[1].lower()
-                    fpath = os.path.join(dirpath, file)
-                    if ext in self.supported_ext:
-                        parse_data = self._parse_python_file(fpath)
-                        results["parsed_files"][fpath] = parse_data
-                    else:
-                        results["unsupported_files"].append(fpath)
+            if isinstance(root_dir, zipfile.Path):
+                # Members are read straight out of the archive; nothing is extracted to disk.
+                # Parsing is the archive's last use, so the handle is closed once every member is read
+                with root_dir.root as archive:
+                    results["parsed_files"] = self._parse_archive(archive, root_dir.at, results["unsupported_files"])
+            else:
+                python_paths = []
+                for dirpath, _, files in os.walk(root_dir):
+                    prefix = dirpath if dirpath.endswith(os.sep) else dirpath + os.sep
+                    for file in files:
+                        if file.endswith(self.supported_ext):
+                            python_paths.append(prefix + file)
+                        else:
+                            results["unsupported_files"].append(prefix + file)
+                if len(python_paths) < PARALLEL_MIN_FILES:
+                    parsed = map(_parse_python_file, python_paths)
+                else:
+                    with ProcessPoolExecutor() as executor:
+                        parsed = list(executor.map(_parse_python_file, python_paths, chunksize=PARSE_CHUNKSIZE))
+                results["parsed_files"] = dict(zip(python_paths, parsed))
+            _ast_cache.prune()
             print(f"✅ Parsing complete. Files: {len(results['parsed_files'])}")
             return results, "✅ All supported files parsed"
         except Exception as e:
-            print(f"❌ Project parse error: {str(e)}")
-            print("Resolution strategies:\n- Verify directory path\n- Permission check\n- Reduce input size\n- Inspect failing files\n- Debug with minimal example")
+            logger.error(
+                "❌ Project parse error: %s\n"
+                "Resolution strategies:\n- Verify directory path\n- Permission check\n- Reduce input size\n- Inspect failing files\n- Debug with minimal example",
+                e
+            )
             return {}, "❌ Parse error"
 
-    def _parse_python_file(self, fpath):
-        try:
-            with open(fpath, "r", encoding="utf-8") as f:
-                code = f.read()
-            node = ast.parse(code)
-            functions, classes, imports = [], [], {"standard_imports": [], "from_imports": []}
-            for n in ast.walk(node):
-                if isinstance(n, ast.FunctionDef):
-                    functions.append({"name": n.name, "lineno": n.lineno, "end_lineno": getattr(n, "end_lineno", None)})
-                elif isinstance(n, ast.ClassDef):
-                    classes.append({"name": n.name, "lineno": n.lineno, "end_lineno": getattr(n, "end_lineno", None)})
-                elif isinstance(n, ast.Import):
-                    for alias in n.names:
-                        imports["standard_imports"].append({"module": alias.name, "alias": alias.asname, "line": n.lineno})
-                elif isinstance(n, ast.ImportFrom):
-                    for alias in n.names:
-                        imports["from_imports"].append({
-                            "module": n.module, "name": alias.name, "alias": alias.asname, "line": n.lineno
-                        })
-            print(f"📄 {os.path.basename(fpath)}: Parsed ({len(functions)} funcs, {len(classes)} classes, {len(imports['standard_imports'])+len(imports['from_imports'])} imports)")
-            return {
-                "parsing_successful": True,
-                "functions": functions,
-                "classes": classes,
-                "imports": imports,
-                "source_lines": len(code.splitlines()),
-                "source_code": code
-            }
-        except Exception as e:
-            print(f"❌ Failed to parse {fpath}: {str(e)}")
-            print("Resolution strategies:\n- Check syntax validity\n- Remove non-UTF8 chars\n- Check unsupported Python versions\n- Reduce file size\n- Test with simpler file")
-            return {"parsing_successful": False, "error": str(e)}
+    def _parse_archive(self, archive, prefix, unsupported_files):
+        python_paths, members = [], []
+        for member in archive.namelist():
+            if member.endswith("/") or not member.startswith(prefix):
+                continue
+            if member.endswith(self.supported_ext):
+                python_paths.append(os.path.join(archive.filename, member))
+                members.append(member)
+            else:
+                unsupported_files.append(os.path.join(archive.filename, member))
+        if len(python_paths) < PARALLEL_MIN_FILES:
+            parsed = list(map(_parse_python_file, python_paths, members, repeat(archive)))
+        else:
+            with ProcessPoolExecutor(initializer=_init_archive_worker, initargs=(archive.filename,)) as executor:
+                parsed = list(executor.map(_parse_python_file, python_paths, members, chunksize=PARSE_CHUNKSIZE))
+        return dict(zip(python_paths, parsed))
 
 # Test print for CodeParser cell
-print("🎯 analyzers/code_parser.py module export ready.")
+if __name__ == "__main__":
+    print("🎯 analyzers/code_parser.py module export ready.")
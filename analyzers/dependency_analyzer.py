@@ -2,32 +2,72 @@
 
 import os
 import json
-import networkx as nx
+import logging
 import time
 from pathlib import Path
 from collections import defaultdict, Counter
+from itertools import islice
 
 try:
-    import pygraphviz as pgv
-    PYGRAPHVIZ_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    PYGRAPHVIZ_AVAILABLE = False
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MAX_CYCLES_PER_COMPONENT = 1000
+
+def _dump_json(obj):
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode('utf-8')
+
+def _stream_json_array(fh, items, dump):
+    # Writes items one by one so the full array is never materialized in memory
+    fh.write(b'[')
+    first = True
+    for item in items:
+        if not first:
+            fh.write(b',')
+        fh.write(dump(item))
+        first = False
+    fh.write(b']')
+
+def _write_json(path, data):
+    if ORJSON_AVAILABLE:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
 
 class DependencyAnalyzer:
     def __init__(self):
         print("🔗 DependencyAnalyzer initialization complete.")
-        self.dependency_graph = nx.DiGraph()
+        self.dependency_graph = None
         self.module_info = {}
         self.external_dependencies = set()
         self.circular_dependencies = []
+        self.truncated_cycle_components = 0
         self.orphaned_modules = []
 
+    def _ensure_graph(self):
+        # NetworkX is imported on first use so parser/scanner-only runs never pay for it
+        if self.dependency_graph is None:
+            import networkx as nx
+            self.dependency_graph = nx.DiGraph()
+        return self.dependency_graph
+
     def analyze_import_relationships(self, parsing_results):
         print("🔍 Analyzing import relationships across all modules...")
         try:
+            self._ensure_graph()
             start_time = time.time()
             module_mapping = {}
-            file_to_module = {}
+            node_tuples = []
+            pending_imports = []
+            add_pending = pending_imports.append
             
             for file_path, parse_data in parsing_results.get('parsed_files', {}).items():
                 if not parse_data.get('parsing_successful', False):
@@ -35,14 +75,13 @@ class DependencyAnalyzer:
                 
                 module_name = Path(file_path).stem
                 module_mapping[module_name] = file_path
-                file_to_module[file_path] = module_name
                 
-                self.dependency_graph.add_node(module_name, 
-                    file_path=file_path,
-                    functions=len(parse_data.get('functions', [])),
-                    classes=len(parse_data.get('classes', [])),
-                    source_lines=parse_data.get('source_lines', 0)
-                )
+                node_tuples.append((module_name, {
+                    'file_path': file_path,
+                    'functions': len(parse_data.get('functions', [])),
+                    'classes': len(parse_data.get('classes', [])),
+                    'source_lines': parse_data.get('source_lines', 0)
+                }))
                 
                 self.module_info[module_name] = {
                     'file_path': file_path,
@@ -55,47 +94,40 @@ class DependencyAnalyzer:
                         'source_lines': parse_data.get('source_lines', 0)
                     }
                 }
-            
-            dependency_count = 0
-            
-            for file_path, parse_data in parsing_results.get('parsed_files', {}).items():
-                if not parse_data.get('parsing_successful', False):
-                    continue
                 
-                source_module = file_to_module[file_path]
+                # Targets can only be resolved once every module is known, so defer them
                 imports_data = parse_data.get('imports', {})
-                
                 for import_info in imports_data.get('standard_imports', []):
-                    target_module = import_info.get('module', '')
-                    
-                    if target_module in module_mapping:
-                        self.dependency_graph.add_edge(
-                            source_module, 
-                            target_module,
-                            import_type='standard',
-                            line_number=import_info.get('line', 0),
-                            alias=import_info.get('alias')
-                        )
-                        dependency_count += 1
-                    else:
-                        self.external_dependencies.add(target_module)
-                
+                    add_pending((module_name, import_info.get('module', ''), 'standard', import_info))
                 for import_info in imports_data.get('from_imports', []):
-                    source_module_name = import_info.get('module', '')
-                    imported_name = import_info.get('name', '')
-                    
-                    if source_module_name in module_mapping:
-                        self.dependency_graph.add_edge(
-                            source_module,
-                            source_module_name,
-                            import_type='from_import',
-                            imported_name=imported_name,
-                            line_number=import_info.get('line', 0),
-                            alias=import_info.get('alias')
-                        )
-                        dependency_count += 1
-                    else:
-                        self.external_dependencies.add(source_module_name)
+                    add_pending((module_name, import_info.get('module', ''), 'from_import', import_info))
+            
+            self.dependency_graph.add_nodes_from(node_tuples)
+            
+            edge_tuples = []
+            known_modules = frozenset(module_mapping)
+            add_edge = edge_tuples.append
+            add_external = self.external_dependencies.add
+            
+            for source_module, target_module, import_type, import_info in pending_imports:
+                if target_module not in known_modules:
+                    add_external(target_module)
+                elif import_type == 'standard':
+                    add_edge((source_module, target_module, {
+                        'import_type': 'standard',
+                        'line_number': import_info.get('line', 0),
+                        'alias': import_info.get('alias')
+                    }))
+                else:
+                    add_edge((source_module, target_module, {
+                        'import_type': 'from_import',
+                        'imported_name': import_info.get('name', ''),
+                        'line_number': import_info.get('line', 0),
+                        'alias': import_info.get('alias')
+                    }))
+            
+            self.dependency_graph.add_edges_from(edge_tuples)
+            dependency_count = len(edge_tuples)
             
             self._detect_circular_dependencies()
             self._identify_orphaned_modules()
@@ -107,6 +139,8 @@ class DependencyAnalyzer:
             print(f"  🔗 Dependencies found: {dependency_count}")
             print(f"  🌐 External dependencies: {len(self.external_dependencies)}")
             print(f"  🔄 Circular dependencies: {len(self.circular_dependencies)}")
+            if self.truncated_cycle_components:
+                print(f"  ✂️ Cycle listing capped at {MAX_CYCLES_PER_COMPONENT} in {self.truncated_cycle_components} component(s)")
             print(f"  👤 Orphaned modules: {len(self.orphaned_modules)}")
             print(f"  ⏱️ Analysis time: {analysis_time:.2f}s")
             
@@ -122,53 +156,73 @@ class DependencyAnalyzer:
                     'total_dependencies': dependency_count,
                     'external_count': len(self.external_dependencies),
                     'circular_count': len(self.circular_dependencies),
+                    'circular_truncated_components': self.truncated_cycle_components,
                     'orphaned_count': len(self.orphaned_modules)
                 }
             }, "✅ Dependency graph analysis completed"
             
         except Exception as e:
             error_msg = f"❌ Dependency analysis failed: {str(e)}"
-            print(error_msg)
-            print("⭐ Resolution Strategies:")
-            print("  1. Check parsing results structure and data integrity")
-            print("  2. Verify NetworkX installation and compatibility")
-            print("  3. Ensure sufficient memory for large projects")
-            print("  4. Try analyzing smaller module subsets")
-            print("  5. Check for circular import issues in source code")
+            logger.error(
+                "%s\n"
+                "⭐ Resolution Strategies:\n"
+                "  1. Check parsing results structure and data integrity\n"
+                "  2. Verify NetworkX installation and compatibility\n"
+                "  3. Ensure sufficient memory for large projects\n"
+                "  4. Try analyzing smaller module subsets\n"
+                "  5. Check for circular import issues in source code",
+                error_msg
+            )
             return None, error_msg
 
     def _detect_circular_dependencies(self):
         try:
-            cycles = list(nx.simple_cycles(self.dependency_graph))
+            import networkx as nx
+            graph = self.dependency_graph
+            sccs = [c for c in nx.strongly_connected_components(graph) if len(c) > 1]
+            in_sccs = set().union(*sccs)
+            # Self-loops inside a multi-module component are already yielded by its simple_cycles
+            cycles = [[u] for u, _ in nx.selfloop_edges(graph) if u not in in_sccs]
+            truncated = 0
+            for component in sccs:
+                # Dense components can hold exponentially many cycles; cap enumeration per component
+                component_cycles = list(islice(nx.simple_cycles(graph.subgraph(component)), MAX_CYCLES_PER_COMPONENT + 1))
+                if len(component_cycles) > MAX_CYCLES_PER_COMPONENT:
+                    component_cycles.pop()
+                    truncated += 1
+                cycles.extend(component_cycles)
             self.circular_dependencies = cycles
+            self.truncated_cycle_components = truncated
             
             if cycles:
                 print(f"⚠️ Found {len(cycles)} circular dependency chains")
                 for i, cycle in enumerate(cycles[:3], 1):
                     print(f"  {i}. {' → '.join(cycle)} → {cycle[0]}")
         except Exception as e:
-            print(f"⚠️ Circular dependency detection failed: {str(e)}")
+            logger.warning("⚠️ Circular dependency detection failed: %s", e)
 
     def _identify_orphaned_modules(self):
         try:
+            succ, pred = self.dependency_graph.succ, self.dependency_graph.pred
             self.orphaned_modules = [
-                node for node in self.dependency_graph.nodes()
-                if self.dependency_graph.in_degree(node) == 0 and 
-                self.dependency_graph.out_degree(node) == 0
+                node for node in self.dependency_graph
+                if not (succ[node] or pred[node])
             ]
         except Exception as e:
-            print(f"⚠️ Orphaned module detection failed: {str(e)}")
+            logger.warning("⚠️ Orphaned module detection failed: %s", e)
 
     def export_to_formats(self, output_dir="./artifacts", session_id="default"):
         print("📁 Exporting dependency data to multiple formats...")
         try:
+            import networkx as nx
+            self._ensure_graph()
             os.makedirs(output_dir, exist_ok=True)
             exported_files = {}
             
             base_name = f"dependencies_{session_id}"
             
-            json_data = {
-                'nodes': [
+            json_sections = {
+                'nodes': (
                     {
                         'id': node,
                         'file_path': data.get('file_path', ''),
@@ -177,8 +231,8 @@ class DependencyAnalyzer:
                         'source_lines': data.get('source_lines', 0)
                     }
                     for node, data in self.dependency_graph.nodes(data=True)
-                ],
-                'edges': [
+                ),
+                'edges': (
                     {
                         'source': u,
                         'target': v,
@@ -188,15 +242,21 @@ class DependencyAnalyzer:
                         'alias': data.get('alias', '')
                     }
                     for u, v, data in self.dependency_graph.edges(data=True)
-                ],
-                'external_dependencies': list(self.external_dependencies),
-                'circular_dependencies': self.circular_dependencies,
-                'orphaned_modules': self.orphaned_modules
+                ),
+                'external_dependencies': iter(self.external_dependencies),
+                'circular_dependencies': iter(self.circular_dependencies),
+                'orphaned_modules': iter(self.orphaned_modules)
             }
             
             json_path = os.path.join(output_dir, f"{base_name}.json")
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2)
+            with open(json_path, 'wb') as f:
+                f.write(b'{')
+                for i, (key, items) in enumerate(json_sections.items()):
+                    if i:
+                        f.write(b',')
+                    f.write(_dump_json(key) + b':')
+                    _stream_json_array(f, items, _dump_json)
+                f.write(b'}')
             exported_files['json'] = json_path
             
             try:
@@ -207,8 +267,7 @@ class DependencyAnalyzer:
             
             adjacency_path = os.path.join(output_dir, f"{base_name}_adjacency.json")
             adjacency_data = nx.adjacency_data(self.dependency_graph)
-            with open(adjacency_path, 'w', encoding='utf-8') as f:
-                json.dump(adjacency_data, f, indent=2)
+            _write_json(adjacency_path, adjacency_data)
             exported_files['adjacency'] = adjacency_path
             
             print(f"✅ Exported dependency data to {len(exported_files)} formats")
@@ -216,12 +275,16 @@ class DependencyAnalyzer:
             
         except Exception as e:
             error_msg = f"❌ Export failed: {str(e)}"
-            print(error_msg)
-            print("⭐ Resolution Strategies:")
-            print("  1. Check output directory permissions")
-            print("  2. Ensure sufficient disk space")
-            print("  3. Verify NetworkX pydot integration")
-            print("  4. Try exporting smaller datasets")
+            logger.error(
+                "%s\n"
+                "⭐ Resolution Strategies:\n"
+                "  1. Check output directory permissions\n"
+                "  2. Ensure sufficient disk space\n"
+                "  3. Verify NetworkX pydot integration\n"
+                "  4. Try exporting smaller datasets",
+                error_msg
+            )
             return None, error_msg
 
-print("🎯 analyzers/dependency_analyzer.py module export ready.")
\ No newline at end of file
+if __name__ == "__main__":
+    print("🎯 analyzers/dependency_analyzer.py module export ready.")
@@ -2,69 +2,198 @@
 
 import re
 import os
+import logging
+import mmap
+import bisect
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PARALLEL_MIN_FILES = 16
+SCAN_CHUNKSIZE = 16
+# Hashing tiny files costs more than rescanning them
+DEDUP_MIN_BYTES = 256
+SEVERITIES = ('high', 'medium', 'low')
+
+_worker_scanner = None
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _candidate_lines(src, line_starts, triggers, trigger_lens):
+        # Case-insensitive substring prefilter: flag lines containing any trigger literal
+        n_lines = line_starts.shape[0]
+        hits = np.zeros(n_lines, dtype=np.bool_)
+        for li in range(n_lines):
+            start = line_starts[li]
+            end = line_starts[li + 1] if li + 1 < n_lines else src.shape[0]
+            for pos in range(start, end):
+                c = np.int64(src[pos])
+                if 65 <= c <= 90:
+                    c += 32
+                for t in range(triggers.shape[0]):
+                    length = trigger_lens[t]
+                    if c != triggers[t, 0] or pos + length > end:
+                        continue
+                    matched = True
+                    for k in range(1, length):
+                        b = np.int64(src[pos + k])
+                        if 65 <= b <= 90:
+                            b += 32
+                        if b != triggers[t, k]:
+                            matched = False
+                            break
+                    if matched:
+                        hits[li] = True
+                        break
+                if hits[li]:
+                    break
+        return np.nonzero(hits)[0]
+
+def _init_scan_worker(vulnerability_patterns):
+    # Compiled databases don't pickle, so each worker process rebuilds the caller's scanner once
+    global _worker_scanner
+    _worker_scanner = SecurityScanner(vulnerability_patterns, announce=False)
+
+def _scan_file_worker(file_path):
+    return _worker_scanner._scan_file(file_path)
+
 class SecurityScanner:
-    def __init__(self):
-        print("🔒 SecurityScanner initialization complete.")
-        self.vulnerability_patterns = {
-            'hardcoded_secrets': [
-                r'password\s*=\s*["\'][^"\']+["\']',
-                r'api_key\s*=\s*["\'][^"\']+["\']',
-                r'secret\s*=\s*["\'][^"\']+["\']',
-                r'token\s*=\s*["\'][^"\']+["\']'
-            ],
-            'sql_injection': [
-                r'execute\s*\(\s*["\'].*%.*["\']',
-                r'query\s*\(\s*["\'].*\+.*["\']',
-                r'cursor\.execute\s*\(\s*["\'].*%.*["\']'
-            ],
-            'command_injection': [
-                r'os\.system\s*\(',
-                r'subprocess\.call\s*\(',
-                r'exec\s*\(',
-                r'eval\s*\('
-            ],
-            'unsafe_imports': [
-                r'import\s+pickle',
-                r'from\s+pickle\s+import',
-                r'import\s+marshal',
-                r'from\s+marshal\s+import'
-            ],
-            'weak_crypto': [
-                r'hashlib\.md5\s*\(',
-                r'hashlib\.sha1\s*\(',
-                r'random\.random\s*\(',
-                r'random\.choice\s*\('
-            ]
+    def __init__(self, vulnerability_patterns=None, announce=True):
+        if announce:
+            print("🔒 SecurityScanner initialization complete.")
+        # Custom tables are kept as given (None means the defaults) so pool workers can rebuild this exact scanner
+        self._custom_patterns = vulnerability_patterns
+        if vulnerability_patterns is None:
+            # Files are scanned whole, so whitespace and quoted-value classes exclude \n to keep every match on one line
+            vulnerability_patterns = {
+                'hardcoded_secrets': [
+                    r'password[^\S\n]*=[^\S\n]*["\'][^"\'\n]+["\']',
+                    r'api_key[^\S\n]*=[^\S\n]*["\'][^"\'\n]+["\']',
+                    r'secret[^\S\n]*=[^\S\n]*["\'][^"\'\n]+["\']',
+                    r'token[^\S\n]*=[^\S\n]*["\'][^"\'\n]+["\']'
+                ],
+                'sql_injection': [
+                    r'execute[^\S\n]*\([^\S\n]*["\'].*%.*["\']',
+                    r'query[^\S\n]*\([^\S\n]*["\'].*\+.*["\']',
+                    r'cursor\.execute[^\S\n]*\([^\S\n]*["\'].*%.*["\']'
+                ],
+                'command_injection': [
+                    r'os\.system[^\S\n]*\(',
+                    r'subprocess\.call[^\S\n]*\(',
+                    r'exec[^\S\n]*\(',
+                    r'eval[^\S\n]*\('
+                ],
+                'unsafe_imports': [
+                    r'import[^\S\n]+pickle',
+                    r'from[^\S\n]+pickle[^\S\n]+import',
+                    r'import[^\S\n]+marshal',
+                    r'from[^\S\n]+marshal[^\S\n]+import'
+                ],
+                'weak_crypto': [
+                    r'hashlib\.md5[^\S\n]*\(',
+                    r'hashlib\.sha1[^\S\n]*\(',
+                    r'random\.random[^\S\n]*\(',
+                    r'random\.choice[^\S\n]*\('
+                ]
+            }
+        self.vulnerability_patterns = vulnerability_patterns
+        self.fused_patterns = {
+            category: re.compile(
+                '|'.join(f'(?P<g{i}>{pattern})' for i, pattern in enumerate(patterns)).encode(),
+                re.IGNORECASE | re.MULTILINE
+            )
+            for category, patterns in self.vulnerability_patterns.items()
         }
+        # Every default pattern contains at least one of these lowercase literals; custom tables skip the prefilter
+        self._use_prefilter = NUMBA_AVAILABLE and self._custom_patterns is None
+        self.prefilter_triggers = (
+            b'password', b'api_key', b'secret', b'token', b'exec', b'query', b'os.system',
+            b'subprocess', b'eval', b'pickle', b'marshal', b'md5', b'sha1', b'random'
+        )
+        if self._use_prefilter:
+            width = max(len(trigger) for trigger in self.prefilter_triggers)
+            self._trigger_table = np.zeros((len(self.prefilter_triggers), width), dtype=np.int64)
+            for i, trigger in enumerate(self.prefilter_triggers):
+                self._trigger_table[i, :len(trigger)] = list(trigger)
+            self._trigger_lens = np.array([len(trigger) for trigger in self.prefilter_triggers], dtype=np.int64)
+        self.pattern_index = [
+            (category, i)
+            for category, patterns in self.vulnerability_patterns.items()
+            for i in range(len(patterns))
+        ]
+        # Findings are stored as (file_id, line_number, category_id, severity_id, pattern_id, snippet)
+        self.categories = list(self.vulnerability_patterns)
+        self.pattern_category_ids = [self.categories.index(category) for category, _ in self.pattern_index]
+        self.category_severity_ids = [SEVERITIES.index(self._determine_severity(c)) for c in self.categories]
+        self._category_offsets = {}
+        for pattern_id, (category, i) in enumerate(self.pattern_index):
+            self._category_offsets.setdefault(category, pattern_id)
+        self.hyperscan_db = self._build_hyperscan_database() if HYPERSCAN_AVAILABLE else None
+
+    def _build_hyperscan_database(self):
+        try:
+            db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            db.compile(
+                expressions=[self.vulnerability_patterns[category][i].encode() for category, i in self.pattern_index],
+                ids=list(range(len(self.pattern_index))),
+                elements=len(self.pattern_index),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST] * len(self.pattern_index)
+            )
+            logger.debug("⚡ Hyperscan pattern database compiled.")
+            return db
+        except Exception as e:
+            logger.warning("⚠️ Hyperscan compile failed, falling back to re engine: %s", e)
+            return None
 
     def comprehensive_security_scan(self, parsing_results):
         print("🛡️ Starting comprehensive security analysis...")
         try:
             vulnerabilities = []
-            risk_summary = {'high': 0, 'medium': 0, 'low': 0}
             
             parsed_files = parsing_results.get('parsed_files', {})
             
-            for file_path, parse_data in parsed_files.items():
-                if not parse_data.get('parsing_successful', False):
-                    continue
-                
-                source_code = parse_data.get('source_code', '')
-                if not source_code:
-                    continue
-                
-                file_vulnerabilities = self._scan_file_content(file_path, source_code)
-                vulnerabilities.extend(file_vulnerabilities)
-                
-                for vuln in file_vulnerabilities:
-                    risk_summary[vuln['severity']] += 1
+            file_paths = [
+                file_path for file_path, parse_data in parsed_files.items()
+                if parse_data.get('parsing_successful', False)
+            ]
+            
+            unique_paths, duplicate_of = self._group_identical_files(file_paths, parsed_files)
+            
+            if len(unique_paths) < PARALLEL_MIN_FILES:
+                unique_results = map(self._scan_file, unique_paths)
+            else:
+                with ProcessPoolExecutor(initializer=_init_scan_worker, initargs=(self._custom_patterns,)) as executor:
+                    unique_results = executor.map(_scan_file_worker, unique_paths, chunksize=SCAN_CHUNKSIZE)
+            results_by_path = dict(zip(unique_paths, unique_results))
+            
+            # Per-file hits are file-agnostic, so identical copies just reuse the first copy's tuples
+            for file_id, file_path in enumerate(file_paths):
+                hits = results_by_path[duplicate_of.get(file_path, file_path)]
+                vulnerabilities.extend((file_id, *hit) for hit in hits)
+            
+            severity_counts = Counter(hit[3] for hit in vulnerabilities)
+            risk_summary = {severity: severity_counts[i] for i, severity in enumerate(SEVERITIES)}
             
             scan_results = {
                 'vulnerabilities': vulnerabilities,
+                'file_paths': file_paths,
                 'risk_summary': risk_summary,
-                'total_files_scanned': len([f for f in parsed_files if parsed_files[f].get('parsing_successful', False)]),
+                'total_files_scanned': len(file_paths),
                 'total_vulnerabilities': len(vulnerabilities)
             }
             
@@ -79,36 +208,122 @@ class SecurityScanner:
             
         except Exception as e:
             error_msg = f"❌ Security scan failed: {str(e)}"
-            print(error_msg)
-            print("⭐ Resolution Strategies:")
-            print("  1. Check source code encoding and format")
-            print("  2. Verify regex pattern compatibility")
-            print("  3. Reduce file size for memory constraints")
-            print("  4. Test with individual files first")
-            print("  5. Update vulnerability pattern database")
+            logger.error(
+                "%s\n"
+                "⭐ Resolution Strategies:\n"
+                "  1. Check source code encoding and format\n"
+                "  2. Verify regex pattern compatibility\n"
+                "  3. Reduce file size for memory constraints\n"
+                "  4. Test with individual files first\n"
+                "  5. Update vulnerability pattern database",
+                error_msg
+            )
             return None, error_msg
 
-    def _scan_file_content(self, file_path, source_code):
-        vulnerabilities = []
-        lines = source_code.split('\n')
+    def _group_identical_files(self, file_paths, parsed_files):
+        # The parser already hashed each file's bytes, so duplicates are found without reading anything again
+        unique_paths, duplicate_of, first_by_digest = [], {}, {}
+        for file_path in file_paths:
+            parse_data = parsed_files[file_path]
+            digest = parse_data.get('content_hash')
+            if digest is not None and parse_data.get('file_size', 0) >= DEDUP_MIN_BYTES:
+                first_path = first_by_digest.setdefault(digest, file_path)
+                if first_path != file_path:
+                    duplicate_of[file_path] = first_path
+                    continue
+            unique_paths.append(file_path)
+        return unique_paths, duplicate_of
+
+    def _scan_file(self, file_path):
+        try:
+            with open(file_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return self._scan_file_content(data)
+        except OSError as e:
+            logger.warning("⚠️ Could not read %s for scanning: %s", file_path, e)
+            return []
+
+    def _scan_file_content(self, data):
+        hits = []
+        line_starts = [0]
+        line_starts.extend(match.end() for match in re.finditer(b'\n', data))
+        
+        if self.hyperscan_db is not None:
+            matches = self._hyperscan_matches(data)
+        else:
+            matches = self._regex_matches(data, line_starts)
+        
+        for start, pattern_id in matches:
+            line_index = bisect.bisect_right(line_starts, start) - 1
+            line_start = line_starts[line_index]
+            line_end = data.find(b'\n', line_start)
+            line = data[line_start:] if line_end == -1 else data[line_start:line_end]
+            category_id = self.pattern_category_ids[pattern_id]
+            hits.append((
+                line_index + 1,
+                category_id,
+                self.category_severity_ids[category_id],
+                pattern_id,
+                line.decode('utf-8', errors='replace').strip()
+            ))
+        
+        return hits
+
+    def iter_vulnerabilities(self, scan_results):
+        file_paths = scan_results.get('file_paths', [])
+        for file_id, line_number, category_id, severity_id, pattern_id, snippet in scan_results.get('vulnerabilities', []):
+            category, pattern_idx = self.pattern_index[pattern_id]
+            yield {
+                'file_path': file_paths[file_id],
+                'line_number': line_number,
+                'category': category,
+                'severity': SEVERITIES[severity_id],
+                'pattern_matched': self.vulnerability_patterns[category][pattern_idx],
+                'code_snippet': snippet,
+                'description': self._get_vulnerability_description(category)
+            }
+
+    def _regex_matches(self, data, line_starts):
+        if self._use_prefilter:
+            candidates = _candidate_lines(
+                np.frombuffer(data, dtype=np.uint8), np.array(line_starts, dtype=np.int64),
+                self._trigger_table, self._trigger_lens
+            )
+            spans = [
+                (line_starts[i], line_starts[i + 1] if i + 1 < len(line_starts) else len(data))
+                for i in candidates
+            ]
+        else:
+            spans = [(0, len(data))]
+        
+        for category, regex in self.fused_patterns.items():
+            offset = self._category_offsets[category]
+            for span_start, span_end in spans:
+                for match in regex.finditer(data, span_start, span_end):
+                    yield match.start(), offset + match.lastindex - 1
+
+    def _hyperscan_matches(self, data):
+        spans = {}
         
-        for category, patterns in self.vulnerability_patterns.items():
-            for pattern in patterns:
-                for line_num, line in enumerate(lines, 1):
-                    matches = re.finditer(pattern, line, re.IGNORECASE)
-                    for match in matches:
-                        severity = self._determine_severity(category)
-                        vulnerabilities.append({
-                            'file_path': file_path,
-                            'line_number': line_num,
-                            'category': category,
-                            'severity': severity,
-                            'pattern_matched': pattern,
-                            'code_snippet': line.strip(),
-                            'description': self._get_vulnerability_description(category)
-                        })
+        def on_match(pattern_id, start, end, flags, context):
+            category_id = self.pattern_category_ids[pattern_id]
+            best = spans.get((category_id, start))
+            if best is None or pattern_id < best[1] or (pattern_id == best[1] and end > best[0]):
+                spans[(category_id, start)] = (end, pattern_id)
         
-        return vulnerabilities
+        self.hyperscan_db.scan(data, match_event_handler=on_match)
+        
+        # Hyperscan reports every match end; keep leftmost non-overlapping spans per category like re
+        matches = []
+        last_end = {}
+        for (category_id, start), (end, pattern_id) in sorted(spans.items()):
+            if start < last_end.get(category_id, 0):
+                continue
+            last_end[category_id] = end
+            matches.append((start, pattern_id))
+        return matches
 
     def _determine_severity(self, category):
         severity_map = {
@@ -135,25 +350,29 @@ class SecurityScanner:
         try:
             os.makedirs(output_dir, exist_ok=True)
             
-            vulnerabilities = scan_results.get('vulnerabilities', [])
+            vulnerabilities = self.iter_vulnerabilities(scan_results)
             risk_summary = scan_results.get('risk_summary', {})
+            severity_emoji_map = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}
             
-            report_content = f"""# Security Vulnerability Report
+            report_path = os.path.join(output_dir, f"security_report_{session_id}.md")
+            # Stream sections straight to disk rather than growing one string per finding
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.write(f"""# Security Vulnerability Report
 
 ## Summary
 - **Total Files Scanned:** {scan_results.get('total_files_scanned', 0)}
-- **Total Vulnerabilities:** {len(vulnerabilities)}
+- **Total Vulnerabilities:** {len(scan_results.get('vulnerabilities', []))}
 - **High Risk:** {risk_summary.get('high', 0)}
 - **Medium Risk:** {risk_summary.get('medium', 0)}
 - **Low Risk:** {risk_summary.get('low', 0)}
 
 ## Detailed Findings
 
-"""
-            
-            for i, vuln in enumerate(vulnerabilities, 1):
-                severity_emoji = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}.get(vuln['severity'], '⚪')
-                report_content += f"""### {i}. {severity_emoji} {vuln['category'].replace('_', ' ').title()}
+""")
+                
+                for i, vuln in enumerate(vulnerabilities, 1):
+                    severity_emoji = severity_emoji_map.get(vuln['severity'], '⚪')
+                    f.write(f"""### {i}. {severity_emoji} {vuln['category'].replace('_', ' ').title()}
 
 **File:** `{Path(vuln['file_path']).name}`  
 **Line:** {vuln['line_number']}  
@@ -167,24 +386,24 @@ class SecurityScanner:
 
 ---
 
-"""
-            
-            report_path = os.path.join(output_dir, f"security_report_{session_id}.md")
-            with open(report_path, 'w', encoding='utf-8') as f:
-                f.write(report_content)
+""")
             
             print(f"✅ Security report generated: {report_path}")
             return report_path, "✅ Security report generated successfully"
             
         except Exception as e:
             error_msg = f"❌ Report generation failed: {str(e)}"
-            print(error_msg)
-            print("⭐ Resolution Strategies:")
-            print("  1. Check write permissions for output directory")
-            print("  2. Ensure sufficient disk space")
-            print("  3. Verify scan results data structure")
-            print("  4. Try generating smaller reports")
-            print("  5. Check file encoding compatibility")
+            logger.error(
+                "%s\n"
+                "⭐ Resolution Strategies:\n"
+                "  1. Check write permissions for output directory\n"
+                "  2. Ensure sufficient disk space\n"
+                "  3. Verify scan results data structure\n"
+                "  4. Try generating smaller reports\n"
+                "  5. Check file encoding compatibility",
+                error_msg
+            )
             return None, error_msg
 
-print("🎯 analyzers/security_scanner.py module export ready.")
+if __name__ == "__main__":
+    print("🎯 analyzers/security_scanner.py module export ready.")
@@ -2,9 +2,9 @@
 
 import gradio as gr
 import os
+import threading
 import torch
 import json
-from datetime import datetime
 from pathlib import Path
 
 # Import your modules
@@ -14,20 +14,32 @@ from analyzers.dependency_analyzer import DependencyAnalyzer
 from analyzers.security_scanner import SecurityScanner
 from visualizers.diagram_generator import DiagramGenerator
 from visualizers.chart_creator import ChartCreator
-from utils.helpers import ProjectHelpers
+from utils.helpers import ProjectHelpers, new_session_id
 
 # Initialize global components
 print("🚀 Initializing Code Architecture Visualizer...")
-MODEL_NAME = "THUDM/glm-4-9b-chat"
-glm_handler = GLMHandler(MODEL_NAME)
+MODEL_NAME = "THUDM/glm-4-9b-chat-hf"
 code_parser = CodeParser()
-dependency_analyzer = DependencyAnalyzer()
 security_scanner = SecurityScanner()
-diagram_generator = DiagramGenerator()
-chart_creator = ChartCreator()
+# gr.HTML can't resolve paths into ./artifacts, so the UI keeps inline data URIs
+diagram_generator = DiagramGenerator(embed_base64=True)
+chart_creator = ChartCreator(embed_base64=True)
 helpers = ProjectHelpers()
 print("✅ All modules initialized successfully!")
 
+# The GLM model is multi-GB, so it is only downloaded and loaded when AI Documentation is first requested
+_glm_handler = None
+_glm_lock = threading.Lock()
+
+def get_glm():
+    global _glm_handler
+    if _glm_handler is None:
+        # Concurrent first requests must not each load a copy of the 9B model
+        with _glm_lock:
+            if _glm_handler is None:
+                _glm_handler = GLMHandler(MODEL_NAME)
+    return _glm_handler
+
 # At the top of your app.py
 try:
     import pygraphviz as pgv
@@ -43,25 +55,32 @@ def create_visualization(self, dependency_result):
     else:
         return self._create_networkx_visualization(dependency_result)
 
-def analyze_codebase(file_upload, github_url, features_selected, progress=gr.Progress()):
-    """Main analysis function combining all notebook functionality"""
+def analyze_codebase(file_upload, github_url, features_selected, progress=gr.Progress(track_tqdm=True)):
+    """Main analysis function combining all notebook functionality.
+    
+    Yields (summary, visuals, downloads) after each stage so the UI fills in as results arrive.
+    """
     try:
         progress(0, desc="🚀 Starting analysis...")
+        session_id = new_session_id()
         
         # Step 1: Get codebase
         if file_upload:
-            codebase_path = helpers.extract_codebase(file_upload)
+            # Security scanning and AI docs read files from disk; every other feature only needs parse results
+            lazy_extract = not {"Security Scan", "AI Documentation"} & set(features_selected)
+            codebase_path = helpers.extract_codebase(file_upload, session_id=session_id, lazy=lazy_extract)
             source_type = "upload"
         elif github_url:
-            codebase_path = helpers.clone_repository(github_url)
+            codebase_path = helpers.clone_repository(github_url, session_id=session_id)
             source_type = "github"
         else:
-            return "❌ Please provide either a file upload or GitHub URL", None, None
+            yield "❌ Please provide either a file upload or GitHub URL", None, None
+            return
         
         if not codebase_path:
-            return "❌ Failed to prepare codebase for analysis", None, None
+            yield "❌ Failed to prepare codebase for analysis", None, None
+            return
         
-        session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         artifacts_dir = helpers.create_session_artifacts(session_id)
         
         results = {"session_id": session_id, "source": source_type, "features": []}
@@ -71,10 +90,16 @@ def analyze_codebase(file_upload, github_url, features_selected, progress=gr.Pro
         parsing_results, parse_msg = code_parser.parse_project(codebase_path)
         results["parsing"] = {"results": parsing_results, "message": parse_msg}
         
-        diagrams_html = ""
-        charts_html = ""
+        diagrams_html = []
+        charts_html = []
         download_files = []
         
+        def partial_results():
+            combined_visuals = "".join(diagrams_html + charts_html) if (diagrams_html or charts_html) else "<p>No visualizations generated</p>"
+            return format_results_display(results), combined_visuals, list(download_files)
+        
+        yield partial_results()
+        
         # Step 3: Run selected features
         if "Architecture Diagram" in features_selected:
             progress(0.4, desc="🎨 Generating architecture diagrams...")
@@ -90,18 +115,22 @@ def analyze_codebase(file_upload, github_url, features_selected, progress=gr.Pro
             if diagram_result:
                 for diagram_type, diagram_data in diagram_result.items():
                     if 'html_content' in diagram_data:
-                        diagrams_html += f"<h3>{diagram_type.title()}</h3>" + diagram_data['html_content']
+                        diagrams_html.append(f"<h3>{diagram_type.title()}</h3>")
+                        diagrams_html.append(diagram_data['html_content'])
                     if 'file_path' in diagram_data:
                         download_files.append(diagram_data['file_path'])
+            yield partial_results()
         
         if "Dependency Analysis" in features_selected:
             progress(0.6, desc="🔗 Analyzing dependencies...")
-            dep_result, dep_msg = dependency_analyzer.analyze_import_relationships(parsing_results)
+            # The analyzer accumulates graph state, so every request gets its own
+            dep_result, dep_msg = DependencyAnalyzer().analyze_import_relationships(parsing_results)
             results["features"].append({
                 "name": "Dependency Analysis", 
                 "result": dep_result,
                 "message": dep_msg
             })
+            yield partial_results()
         
         if "Security Scan" in features_selected:
             progress(0.8, desc="🔒 Scanning for vulnerabilities...")
@@ -111,15 +140,17 @@ def analyze_codebase(file_upload, github_url, features_selected, progress=gr.Pro
                 "result": security_result,
                 "message": security_msg
             })
+            yield partial_results()
         
         if "AI Documentation" in features_selected:
             progress(0.9, desc="📚 Generating AI documentation...")
-            doc_result, doc_msg = glm_handler.generate_documentation(parsing_results)
+            doc_result, doc_msg = get_glm().generate_documentation(parsing_results)
             results["features"].append({
                 "name": "AI Documentation",
                 "result": doc_result,
                 "message": doc_msg
             })
+            yield partial_results()
         
         if "Metrics Charts" in features_selected:
             progress(0.95, desc="📊 Creating metrics charts...")
@@ -129,58 +160,59 @@ def analyze_codebase(file_upload, github_url, features_selected, progress=gr.Pro
             if chart_result:
                 for chart_type, chart_data in chart_result.items():
                     if 'html_content' in chart_data:
-                        charts_html += f"<h3>{chart_type.title()}</h3>" + chart_data['html_content']
+                        charts_html.append(f"<h3>{chart_type.title()}</h3>")
+                        charts_html.append(chart_data['html_content'])
                     if 'file_path' in chart_data:
                         download_files.append(chart_data['file_path'])
         
         progress(1.0, desc="✅ Analysis complete!")
         
-        # Format results for display
-        summary = format_results_display(results)
-        combined_visuals = diagrams_html + charts_html if (diagrams_html or charts_html) else "<p>No visualizations generated</p>"
-        
-        return summary, combined_visuals, download_files
+        yield partial_results()
         
     except Exception as e:
         error_msg = f"❌ Analysis failed: {str(e)}"
         print(error_msg)
-        return error_msg, None, None
+        yield error_msg, None, None
 
 def format_results_display(results):
     """Format analysis results for Gradio display"""
-    output = f"# 🎯 Analysis Results - {results['session_id']}\n\n"
+    parts = [f"# 🎯 Analysis Results - {results['session_id']}\n\n"]
     
     parsing_info = results.get("parsing", {})
     if parsing_info:
-        output += f"**📊 Parsing Status:** {parsing_info.get('message', 'Unknown')}\n\n"
+        parts.append(f"**📊 Parsing Status:** {parsing_info.get('message', 'Unknown')}\n\n")
     
     for feature in results["features"]:
-        output += f"## {feature['name']}\n\n"
-        output += f"**Status:** {feature['message']}\n\n"
+        parts.append(f"## {feature['name']}\n\n")
+        parts.append(f"**Status:** {feature['message']}\n\n")
         
         if feature['name'] == "Architecture Diagram":
             if feature['result']:
-                output += f"**Diagrams Generated:** ✅ ({len(feature['result'])} types)\n\n"
+                parts.append(f"**Diagrams Generated:** ✅ ({len(feature['result'])} types)\n\n")
             else:
-                output += f"**Diagrams Generated:** ❌\n\n"
+                parts.append(f"**Diagrams Generated:** ❌\n\n")
                 
         elif feature['name'] == "Dependency Analysis":
             if feature['result']:
                 summary = feature['result'].get('summary', {})
-                output += f"**Modules:** {summary.get('total_modules', 0)}\n"
-                output += f"**Dependencies:** {summary.get('total_dependencies', 0)}\n"
-                output += f"**Circular Dependencies:** {summary.get('circular_count', 0)}\n\n"
+                parts.append(f"**Modules:** {summary.get('total_modules', 0)}\n")
+                parts.append(f"**Dependencies:** {summary.get('total_dependencies', 0)}\n")
+                circular = summary.get('circular_count', 0)
+                # A capped listing is a lower bound, so say so rather than report it as the exact count
+                if summary.get('circular_truncated_components', 0):
+                    circular = f"{circular}+ (listing capped)"
+                parts.append(f"**Circular Dependencies:** {circular}\n\n")
                 
         elif feature['name'] == "Security Scan":
             if feature['result']:
                 vulnerabilities = feature['result'].get('vulnerabilities', [])
-                output += f"**Vulnerabilities Found:** {len(vulnerabilities)}\n\n"
+                parts.append(f"**Vulnerabilities Found:** {len(vulnerabilities)}\n\n")
                 
         elif feature['name'] == "AI Documentation":
             if feature['result']:
-                output += f"**Documentation Generated:** ✅\n\n"
+                parts.append(f"**Documentation Generated:** ✅\n\n")
     
-    return output
+    return "".join(parts)
 
 def create_gradio_app():
     """Create the main Gradio interface"""
@@ -268,7 +300,8 @@ def create_gradio_app():
             fn=analyze_codebase,
             inputs=[file_upload, github_url, features_selected],
             outputs=[results_display, diagram_display, download_files],
-            show_progress=True
+            show_progress=True,
+            concurrency_limit=2
         )
         
         gr.HTML("""
@@ -283,6 +316,7 @@ def create_gradio_app():
 if __name__ == "__main__":
     print("🌟 Launching Code Architecture Visualizer...")
     app = create_gradio_app()
+    app.queue(default_concurrency_limit=4)
     app.launch(
         server_name="0.0.0.0",
         server_port=7860,
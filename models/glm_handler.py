@@ -1,13 +1,29 @@
 # models/glm_handler.py
 
 import os
+import json
+import atexit
+import hashlib
+import threading
 import torch
 from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
 from huggingface_hub import login, snapshot_download
 import gc
 
+try:
+    import flash_attn
+    FLASH_ATTN_AVAILABLE = True
+except ImportError:
+    FLASH_ATTN_AVAILABLE = False
+
+DOC_PROMPT_PREFIX = "Document this code in markdown (for developer handoff):\n\n"
+# Upper bound on characters per token, used to avoid reading more of a file than can fit the token budget
+MAX_CHARS_PER_TOKEN = 8
+# Compiled batches are padded to a multiple of this length, so prompt shapes fall into a few reusable buckets
+COMPILED_PAD_MULTIPLE = 512
+
 class GLMHandler:
-    def __init__(self, model_id="THUDM/glm-4-9b-chat", hf_token=None, local_dir="./models/glm4"):
+    def __init__(self, model_id="THUDM/glm-4-9b-chat-hf", hf_token=None, local_dir="./models/glm4-hf", doc_cache_path="./artifacts/doc_cache.json", max_doc_context=2048):
         print("🚀 GLMHandler initialization started")
         self.model_id = model_id
         self.hf_token = hf_token or os.environ.get("HF_TOKEN", None)
@@ -15,8 +31,37 @@ class GLMHandler:
         self.model = None
         self.tokenizer = None
         self.load_success = False
+        self._doc_prefix_ids = []
+        # Code tokens per documentation prompt; prefix + context + 400 new tokens stays well inside GLM-4's window
+        self.max_doc_context = max_doc_context
+        self.generate_kwargs = {"use_cache": True}
+        self._compiled = False
+        # One model instance serves every Gradio session; compiled graphs and the static cache can't be shared mid-decode
+        self._generate_lock = threading.Lock()
+        self.doc_cache_path = doc_cache_path
+        self._doc_cache = self._load_doc_cache()
+        atexit.register(self._save_doc_cache)
         self._setup()
 
+    def _load_doc_cache(self):
+        try:
+            with open(self.doc_cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            print(f"📚 Loaded {len(cache)} cached documentation entries")
+            return cache
+        except (OSError, ValueError):
+            return {}
+
+    def _save_doc_cache(self):
+        if not self._doc_cache:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.doc_cache_path) or ".", exist_ok=True)
+            with open(self.doc_cache_path, "w", encoding="utf-8") as f:
+                json.dump(self._doc_cache, f)
+        except OSError as e:
+            print(f"⚠️ Could not persist documentation cache: {str(e)}")
+
     def _setup(self):
         print(f"💾 Preparing environment for {self.model_id}")
         try:
@@ -28,6 +73,8 @@ class GLMHandler:
 
             gpu_mem = torch.cuda.get_device_properties(0).total_memory // 1024**3 if torch.cuda.is_available() else 0
             quant_use = gpu_mem < 16
+            attn_impl = "flash_attention_2" if FLASH_ATTN_AVAILABLE and torch.cuda.is_available() else "sdpa"
+            print(f"⚡ Attention implementation: {attn_impl}")
 
             if not os.path.exists(self.local_dir):
                 print("⬇️ Downloading model from HuggingFace Hub...")
@@ -36,8 +83,11 @@ class GLMHandler:
             else:
                 print("📁 Model found locally.")
 
-            self.tokenizer = AutoTokenizer.from_pretrained(self.local_dir, trust_remote_code=True, padding_side="left")
+            # Left padding keeps every batched prompt flush against its generated tail
+            self.tokenizer = AutoTokenizer.from_pretrained(self.local_dir, use_fast=True, padding_side="left")
             print(f"🔠 Tokenizer loaded: {type(self.tokenizer).__name__}")
+            # The documentation prefix is identical for every file, so tokenize it only once
+            self._doc_prefix_ids = self.tokenizer.encode(DOC_PROMPT_PREFIX, add_special_tokens=True)
 
             if quant_use:
                 print("🧮 Loading model with 4-bit quantization")
@@ -51,25 +101,41 @@ class GLMHandler:
                     self.local_dir,
                     quantization_config=quant_config,
                     device_map="auto",
-                    trust_remote_code=True,
                     torch_dtype=torch.float16,
-                    low_cpu_mem_usage=True
+                    low_cpu_mem_usage=True,
+                    attn_implementation=attn_impl
                 )
             else:
                 print("🧮 Loading full-precision float16 model")
                 self.model = AutoModelForCausalLM.from_pretrained(
                     self.local_dir,
                     device_map="auto",
-                    trust_remote_code=True,
                     torch_dtype=torch.float16,
-                    low_cpu_mem_usage=True
+                    low_cpu_mem_usage=True,
+                    attn_implementation=attn_impl
                 )
+            self._compile_model()
             self.load_success = True
             print("🌟 GLM-4 model ready and loaded on device!")
         except Exception as e:
             print(f"❌ Model setup error: {str(e)}")
             print("Resolution strategies:\n- Verify HuggingFace access\n- Check VRAM availability\n- Try again after restarts\n- Test with smaller model\n- Contact support for persistent failures")
 
+    def _compile_model(self):
+        if not torch.cuda.is_available() or getattr(self.model, "is_quantized", False):
+            return
+        if not getattr(self.model, "_supports_static_cache", False):
+            print("⚠️ Static KV cache unsupported by this model, skipping torch.compile")
+            return
+        try:
+            self.model.forward = torch.compile(self.model.forward, mode="reduce-overhead", fullgraph=False)
+            # The static KV cache only pays off with a compiled forward: it gives the captured graphs fixed shapes
+            self.generate_kwargs["cache_implementation"] = "static"
+            self._compiled = True
+            print("🔥 Model forward pass compiled with torch.compile")
+        except Exception as e:
+            print(f"⚠️ torch.compile unavailable, using eager mode: {str(e)}")
+
     def generate(self, prompt, max_new_tokens=300, temperature=0.7, top_p=0.9):
         print("✏️ GLM-4 Prompt received.")
         if not self.load_success:
@@ -77,17 +143,16 @@ class GLMHandler:
             return "GLM Model unavailable."
         try:
             inputs = self.tokenizer.encode(prompt, return_tensors="pt")
-            if torch.cuda.is_available():
-                self.model = self.model.to("cuda")
-                inputs = inputs.to("cuda")
-            with torch.no_grad():
+            inputs = inputs.to(self.model.device)
+            with self._generate_lock, torch.inference_mode():
                 outputs = self.model.generate(
                     inputs,
                     do_sample=False,
                     max_new_tokens=max_new_tokens,
                     temperature=temperature,
                     top_p=top_p,
-                    pad_token_id=self.tokenizer.eos_token_id
+                    pad_token_id=self.tokenizer.eos_token_id,
+                    **self.generate_kwargs
                 )
             response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
             print("✅ GLM-4 generation successful!")
@@ -96,18 +161,73 @@ class GLMHandler:
             print(f"❌ GLM-4 inference error: {str(e)}")
             print("Resolution strategies:\n- Restart runtime\n- Check VRAM\n- Remove large input\n- Inspect input for errors\n- Ensure compatible CUDA/cuDNN")
 
-    def generate_documentation(self, parsing_results):
+    def _generate_padded(self, batch, max_new_tokens):
+        print(f"✏️ GLM-4 batch of {len(batch['input_ids'])} prompts received.")
+        batch = batch.to(self.model.device)
+        with self._generate_lock, torch.inference_mode():
+            outputs = self.model.generate(
+                **batch,
+                do_sample=False,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=self.tokenizer.eos_token_id,
+                **self.generate_kwargs
+            )
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def _document_snippets(self, snippets, batch_size):
+        if not self.load_success:
+            print("❌ Model not loaded, cannot generate output.")
+            return ["GLM Model unavailable."] * len(snippets)
+        body_ids = self.tokenizer(
+            snippets,
+            add_special_tokens=False,
+            truncation=True,
+            max_length=self.max_doc_context
+        )["input_ids"]
+        prompt_ids = [self._doc_prefix_ids + ids for ids in body_ids]
+        # Each new input shape makes a compiled forward recompile and re-capture its CUDA graphs
+        pad_kwargs = {"pad_to_multiple_of": COMPILED_PAD_MULTIPLE} if self._compiled else {}
+        results = []
+        start = 0
+        while start < len(prompt_ids):
+            try:
+                batch = self.tokenizer.pad({"input_ids": prompt_ids[start:start + batch_size]}, padding=True, return_tensors="pt", **pad_kwargs)
+                results.extend(self._generate_padded(batch, max_new_tokens=400))
+                start += batch_size
+            except torch.cuda.OutOfMemoryError:
+                if batch_size == 1:
+                    raise
+                torch.cuda.empty_cache()
+                batch_size = max(1, batch_size // 2)
+                print(f"⚠️ CUDA out of memory, retrying with batch size {batch_size}")
+        return results
+
+    def generate_documentation(self, parsing_results, batch_size=8):
         print("📝 AI Documentation requested for codebase.")
-        gen_fn = lambda code: self.generate(f"Document this code in markdown (for developer handoff):\n\n{code}", max_new_tokens=400)
         auto_docs = {}
         try:
             parsed_files = parsing_results.get("parsed_files", {})
+            file_keys = {}
+            pending = {}
             for fname, meta in parsed_files.items():
-                if meta.get("parsing_successful"):
-                    code_lines = meta.get("source_code", None)
-                    if code_lines and "docstring" not in meta:
-                        result = gen_fn(code_lines[:512] if isinstance(code_lines, str) else "")
-                        auto_docs[fname] = result
+                if meta.get("parsing_successful") and "docstring" not in meta:
+                    with open(fname, "r", encoding="utf-8", errors="replace") as f:
+                        code_lines = f.read(self.max_doc_context * MAX_CHARS_PER_TOKEN)
+                    if code_lines:
+                        # Keyed on the exact source the model sees, including the context size that truncated it
+                        key = hashlib.sha1(f"{self.max_doc_context}:{code_lines}".encode("utf-8")).hexdigest()
+                        file_keys[fname] = key
+                        if key not in self._doc_cache:
+                            pending.setdefault(key, code_lines)
+
+            generated = {}
+            if pending:
+                generated = dict(zip(pending, self._document_snippets(list(pending.values()), batch_size)))
+                if self.load_success:
+                    self._doc_cache.update(generated)
+
+            for fname, key in file_keys.items():
+                auto_docs[fname] = self._doc_cache.get(key, generated.get(key))
             print("✅ All AI documentation generated.")
             return auto_docs, "✅ Documentation complete"
         except Exception as e:
@@ -116,4 +236,5 @@ class GLMHandler:
             return None, "❌ Documentation failure"
 
 # Test print for GLMHandler cell
-print("🎯 models/glm_handler.py module export ready.")
+if __name__ == "__main__":
+    print("🎯 models/glm_handler.py module export ready.")
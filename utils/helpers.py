@@ -1,49 +1,144 @@
 # utils/helpers.py
 
 import os
+import base64
+import hashlib
 import zipfile
+import tarfile
 import tempfile
 import shutil
+import subprocess
+import itertools
+import array
+import atexit
+import time
 import git
-from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+ENTRY_POINT_NAMES = frozenset({'main.py', 'app.py', 'run.py', '__main__.py'})
+KIND_PY, KIND_JS, KIND_ENTRY, KIND_CONFIG = 1, 2, 4, 8
+# Numba dispatch and first-call warmup only pay off on large trees
+NUMBA_TALLY_MIN_FILES = 10000
+# Only the HEAD tree is analyzed, so skip history, tags and eagerly-fetched blobs
+CLONE_OPTIONS = ['--depth=1', '--filter=blob:none', '--single-branch', '--no-tags']
+
+EXTRACT_CACHE_DIR = os.path.abspath("./cache/extracted")
+CLONE_CACHE_DIR = os.path.abspath("./cache/cloned")
+# Cached trees deliberately outlive sessions, so each cache keeps only its most recently used entries
+MAX_CACHED_TREES = 16
+# Never evict a tree touched this recently; a concurrent session may still be reading it
+CACHE_EVICT_MIN_AGE = 3600
+
+_session_counter = itertools.count()
+
+def new_session_id():
+    # Counter + random suffix keeps ids unique even for analyses started within the same second
+    return f"{int(time.time())}_{next(_session_counter):04d}_{os.urandom(3).hex()}"
+
+def _walk(root):
+    # DirEntry caches its type from the directory listing, so each entry costs no extra stat.
+    # An explicit stack avoids re-yielding every entry through one generator per directory level.
+    pending = [root]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                yield entry
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+
+if NUMBA_AVAILABLE:
+    # Serial on purpose: a parallel kernel starts Numba's thread pool, and the parser/scanner pools fork afterwards
+    @njit(cache=True)
+    def _tally_kinds_numba(kinds):
+        n_py = n_js = n_entry = n_config = 0
+        for i in range(kinds.shape[0]):
+            kind = kinds[i]
+            n_py += kind & 1
+            n_js += (kind >> 1) & 1
+            n_entry += (kind >> 2) & 1
+            n_config += (kind >> 3) & 1
+        return n_py, n_js, n_entry, n_config
+
+def _tally_kinds(kinds):
+    if NUMBA_AVAILABLE and len(kinds) >= NUMBA_TALLY_MIN_FILES:
+        return tuple(int(n) for n in _tally_kinds_numba(np.frombuffer(kinds, dtype=np.uint8)))
+    counts = Counter(kinds)
+    return tuple(
+        sum(n for kind, n in counts.items() if kind & flag)
+        for flag in (KIND_PY, KIND_JS, KIND_ENTRY, KIND_CONFIG)
+    )
+
 class ProjectHelpers:
     def __init__(self):
         print("🛠️ ProjectHelpers initialization complete.")
         self.temp_directories = []
+        # Crashed or abandoned sessions still get their extracted trees removed
+        atexit.register(self._cleanup_at_exit)
 
-    def extract_codebase(self, file_upload):
+    def _cleanup_at_exit(self):
+        # Thread pools refuse new work during interpreter shutdown, so remove serially here
+        for temp_dir in self.temp_directories:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def extract_codebase(self, file_upload, session_id=None, lazy=False):
         print("📂 Extracting uploaded codebase...")
         try:
             if not file_upload:
                 raise ValueError("No file uploaded")
             
-            session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-            temp_dir = tempfile.mkdtemp(prefix=f"codebase_{session_id}_")
-            self.temp_directories.append(temp_dir)
-            
+            session_id = session_id or new_session_id()
             file_path = file_upload.name if hasattr(file_upload, 'name') else file_upload
             
+            if lazy and file_path.endswith('.zip'):
+                # CodeParser reads members on demand from a zipfile.Path root, so skip writing files out;
+                # parse_project takes ownership of the archive handle and closes it when parsing is done
+                print(f"📦 Opening ZIP lazily without extraction: {file_path}")
+                return zipfile.Path(zipfile.ZipFile(file_path))
+            
+            # Re-uploads of the same archive reuse the tree extracted the first time
+            cache_dir = os.path.join(EXTRACT_CACHE_DIR, self._file_digest(file_path))
+            if os.path.isdir(cache_dir):
+                print(f"♻️ Archive already extracted, reusing: {cache_dir}")
+                os.utime(cache_dir)
+                return cache_dir
+            
+            os.makedirs(EXTRACT_CACHE_DIR, exist_ok=True)
+            temp_dir = tempfile.mkdtemp(prefix=f"codebase_{session_id}_", dir=EXTRACT_CACHE_DIR)
+            self.temp_directories.append(temp_dir)
+            
             if file_path.endswith('.zip'):
-                with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                    zip_ref.extractall(temp_dir)
-                print(f"✅ ZIP file extracted to: {temp_dir}")
+                self._extract_zip(file_path, temp_dir)
+                extract_dir = self._publish_cache_dir(temp_dir, cache_dir)
+                print(f"✅ ZIP file extracted to: {extract_dir}")
             elif file_path.endswith(('.tar.gz', '.tgz')):
-                import tarfile
-                with tarfile.open(file_path, 'r:gz') as tar_ref:
-                    tar_ref.extractall(temp_dir)
-                print(f"✅ TAR.GZ file extracted to: {temp_dir}")
+                self._extract_tar(file_path, temp_dir)
+                extract_dir = self._publish_cache_dir(temp_dir, cache_dir)
+                print(f"✅ TAR.GZ file extracted to: {extract_dir}")
             else:
                 raise ValueError(f"Unsupported file format: {Path(file_path).suffix}")
             
-            extracted_files = list(Path(temp_dir).rglob('*'))
+            total_items = file_count = dir_count = 0
+            for entry in _walk(extract_dir):
+                total_items += 1
+                if entry.is_file():
+                    file_count += 1
+                elif entry.is_dir():
+                    dir_count += 1
             print(f"📊 Extraction summary:")
-            print(f"  📁 Total items: {len(extracted_files)}")
-            print(f"  📄 Files: {len([f for f in extracted_files if f.is_file()])}")
-            print(f"  📂 Directories: {len([f for f in extracted_files if f.is_dir()])}")
+            print(f"  📁 Total items: {total_items}")
+            print(f"  📄 Files: {file_count}")
+            print(f"  📂 Directories: {dir_count}")
             
-            return temp_dir
+            return extract_dir
             
         except Exception as e:
             error_msg = f"❌ Codebase extraction failed: {str(e)}"
@@ -56,33 +151,133 @@ class ProjectHelpers:
             print("  5. Check file upload completed successfully")
             return None
 
-    def clone_repository(self, github_url, github_token=None):
+    def _file_digest(self, file_path):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _publish_cache_dir(self, temp_dir, cache_dir):
+        # Rename is atomic, so a half-written tree is never visible under its cache key
+        try:
+            os.rename(temp_dir, cache_dir)
+        except OSError:
+            # A concurrent session already published the same content
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        self.temp_directories.remove(temp_dir)
+        self._prune_cache(os.path.dirname(cache_dir))
+        return cache_dir
+
+    def _prune_cache(self, cache_root):
+        # Directory mtime is the last-use time; in-progress temp trees have '_' in their names and are skipped
+        with os.scandir(cache_root) as entries:
+            cached = sorted(
+                (entry.stat().st_mtime, entry.path) for entry in entries
+                if entry.is_dir(follow_symlinks=False) and entry.name.isalnum()
+            )
+        cutoff = time.time() - CACHE_EVICT_MIN_AGE
+        for mtime, path in cached[:max(0, len(cached) - MAX_CACHED_TREES)]:
+            if mtime < cutoff:
+                print(f"🧹 Evicting cached tree: {path}")
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _remote_head(self, github_url, clone_env):
+        try:
+            output = git.cmd.Git().ls_remote(github_url, 'HEAD', env=clone_env)
+        except git.GitCommandError as e:
+            print(f"⚠️ Could not resolve remote HEAD, skipping clone cache: {str(e)}")
+            return None
+        return output.split()[0] if output else None
+
+    def _extract_zip(self, file_path, temp_dir):
+        root = os.path.realpath(temp_dir)
+        with zipfile.ZipFile(file_path, 'r') as zip_ref:
+            members = zip_ref.infolist()
+            target_dirs = set()
+            for member in members:
+                target = os.path.realpath(os.path.join(root, member.filename))
+                if os.path.commonpath([root, target]) != root:
+                    raise ValueError(f"Unsafe path in archive: {member.filename}")
+                target_dirs.add(target if member.is_dir() else os.path.dirname(target))
+            # Create the tree up front so concurrent extracts never race on makedirs
+            for target_dir in sorted(target_dirs):
+                os.makedirs(target_dir, exist_ok=True)
+            
+            file_members = [member for member in members if not member.is_dir()]
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                list(executor.map(lambda member: zip_ref.extract(member, root), file_members))
+
+    def _extract_tar(self, file_path, temp_dir):
+        # Python 3.12+ (and recent security releases) can reject unsafe members natively
+        extract_kwargs = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+        pigz = shutil.which('pigz')
+        if pigz is None:
+            with tarfile.open(file_path, 'r:gz') as tar_ref:
+                tar_ref.extractall(temp_dir, **extract_kwargs)
+            return
+        
+        # gzip itself is serial, but pigz decompresses in a separate process while tarfile writes
+        with subprocess.Popen([pigz, '-dc', file_path], stdout=subprocess.PIPE) as proc:
+            with tarfile.open(fileobj=proc.stdout, mode='r|') as tar_ref:
+                tar_ref.extractall(temp_dir, **extract_kwargs)
+        if proc.returncode != 0:
+            raise RuntimeError(f"pigz exited with status {proc.returncode}")
+
+    def clone_repository(self, github_url, github_token=None, session_id=None):
         print(f"🔗 Cloning repository: {github_url}")
         try:
             if not github_url or not github_url.startswith(('https://github.com', 'git@github.com')):
                 raise ValueError("Invalid GitHub URL format")
             
-            session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-            temp_dir = tempfile.mkdtemp(prefix=f"repo_{session_id}_")
+            session_id = session_id or new_session_id()
+            
+            clone_env = {'GIT_TERMINAL_PROMPT': '0'}
+            if github_token:
+                # Pass the credential through env-scoped git config so it never appears in argv or the remote URL
+                credentials = base64.b64encode(f"x-access-token:{github_token}".encode()).decode()
+                clone_env.update({
+                    'GIT_CONFIG_COUNT': '1',
+                    'GIT_CONFIG_KEY_0': 'http.https://github.com/.extraheader',
+                    'GIT_CONFIG_VALUE_0': f"AUTHORIZATION: basic {credentials}"
+                })
+            
+            # One ls-remote round-trip tells us whether this exact commit was already cloned
+            head_sha = self._remote_head(github_url, clone_env)
+            cache_dir = None
+            if head_sha:
+                cache_key = hashlib.blake2b(f"{github_url}@{head_sha}".encode(), digest_size=16).hexdigest()
+                cache_dir = os.path.join(CLONE_CACHE_DIR, cache_key)
+                if os.path.isdir(cache_dir):
+                    print(f"♻️ Commit {head_sha[:12]} already cloned, reusing: {cache_dir}")
+                    os.utime(cache_dir)
+                    return cache_dir
+                os.makedirs(CLONE_CACHE_DIR, exist_ok=True)
+            
+            temp_dir = tempfile.mkdtemp(prefix=f"repo_{session_id}_", dir=CLONE_CACHE_DIR if cache_dir else None)
             self.temp_directories.append(temp_dir)
             
             if github_token:
-                auth_url = github_url.replace('https://github.com/', f'https://{github_token}@github.com/')
-                git.Repo.clone_from(auth_url, temp_dir)
+                git.Repo.clone_from(github_url, temp_dir, multi_options=CLONE_OPTIONS, env=clone_env)
                 print("🔐 Repository cloned with authentication")
             else:
-                git.Repo.clone_from(github_url, temp_dir)
+                git.Repo.clone_from(github_url, temp_dir, multi_options=CLONE_OPTIONS, env=clone_env)
                 print("🌐 Repository cloned publicly")
             
-            cloned_files = list(Path(temp_dir).rglob('*'))
-            python_files = [f for f in cloned_files if f.suffix == '.py' and f.is_file()]
+            repo_dir = self._publish_cache_dir(temp_dir, cache_dir) if cache_dir else temp_dir
+            
+            total_items = python_count = 0
+            for entry in _walk(repo_dir):
+                total_items += 1
+                if entry.name.endswith('.py') and entry.is_file():
+                    python_count += 1
             
             print(f"📊 Clone summary:")
-            print(f"  📁 Total items: {len(cloned_files)}")
-            print(f"  🐍 Python files: {len(python_files)}")
-            print(f"  📂 Location: {temp_dir}")
+            print(f"  📁 Total items: {total_items}")
+            print(f"  🐍 Python files: {python_count}")
+            print(f"  📂 Location: {repo_dir}")
             
-            return temp_dir
+            return repo_dir
             
         except Exception as e:
             error_msg = f"❌ Repository cloning failed: {str(e)}"
@@ -125,12 +320,13 @@ class ProjectHelpers:
     def cleanup_session(self, session_id=None):
         print("🧹 Cleaning up temporary session files...")
         try:
-            cleaned_count = 0
-            for temp_dir in self.temp_directories[:]:
-                if os.path.exists(temp_dir):
-                    shutil.rmtree(temp_dir)
-                    self.temp_directories.remove(temp_dir)
-                    cleaned_count += 1
+            temp_dirs = [temp_dir for temp_dir in self.temp_directories if os.path.exists(temp_dir)]
+            if temp_dirs:
+                # rmtree is unlink-bound, so removing trees concurrently overlaps their syscall latency
+                with ThreadPoolExecutor(max_workers=len(temp_dirs)) as executor:
+                    list(executor.map(lambda temp_dir: shutil.rmtree(temp_dir, ignore_errors=True), temp_dirs))
+            self.temp_directories = [temp_dir for temp_dir in self.temp_directories if os.path.exists(temp_dir)]
+            cleaned_count = len(temp_dirs) - len(self.temp_directories)
             
             print(f"✅ Cleanup complete: {cleaned_count} directories removed")
             return True
@@ -152,23 +348,33 @@ class ProjectHelpers:
             if not project_path.exists():
                 raise ValueError("Project path does not exist")
             
-            python_files = list(project_path.rglob('*.py'))
-            js_files = list(project_path.rglob('*.js'))
-            config_files = list(project_path.glob('*requirements*.txt')) + list(project_path.glob('setup.py')) + list(project_path.glob('pyproject.toml'))
+            root = str(project_path)
+            # One byte per entry instead of a Path object per file
+            kinds = array.array('B')
+            for entry in _walk(root):
+                name = entry.name
+                kind = 0
+                if name.endswith('.py'):
+                    kind = KIND_PY | (KIND_ENTRY if name in ENTRY_POINT_NAMES else 0)
+                elif name.endswith('.js'):
+                    kind = KIND_JS
+                # Config files are only recognised at the project root
+                if os.path.dirname(entry.path) == root and (
+                    name in ('setup.py', 'pyproject.toml') or (name.endswith('.txt') and 'requirements' in name[:-4])
+                ):
+                    kind |= KIND_CONFIG
+                kinds.append(kind)
             
-            entry_points = []
-            for py_file in python_files:
-                if py_file.name in ['main.py', 'app.py', 'run.py', '__main__.py']:
-                    entry_points.append(py_file)
+            n_py, n_js, n_entry, n_config = _tally_kinds(kinds)
             
             validation_result = {
-                'valid': len(python_files) > 0 or len(js_files) > 0,
-                'python_files': len(python_files),
-                'js_files': len(js_files),
-                'config_files': len(config_files),
-                'entry_points': len(entry_points),
-                'primary_language': 'python' if len(python_files) >= len(js_files) else 'javascript',
-                'structure_score': min(100, (len(python_files) * 10) + (len(config_files) * 5) + (len(entry_points) * 15))
+                'valid': n_py > 0 or n_js > 0,
+                'python_files': n_py,
+                'js_files': n_js,
+                'config_files': n_config,
+                'entry_points': n_entry,
+                'primary_language': 'python' if n_py >= n_js else 'javascript',
+                'structure_score': min(100, (n_py * 10) + (n_config * 5) + (n_entry * 15))
             }
             
             print(f"📊 Project validation results:")
@@ -192,4 +398,5 @@ class ProjectHelpers:
             print("  5. Check for hidden or system files")
             return None, error_msg
 
-print("🎯 utils/helpers.py module export ready.")
\ No newline at end of file
+if __name__ == "__main__":
+    print("🎯 utils/helpers.py module export ready.")
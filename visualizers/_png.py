@@ -0,0 +1,23 @@
+# visualizers/_png.py
+
+import os
+import io
+import base64
+
+# Screen resolution; zlib level 3 encodes several times faster than the default 6
+PNG_DPI = 120
+PNG_PIL_KWARGS = {'compress_level': 3, 'optimize': False}
+
+def save_png(fig, png_path, embed_base64=False, **savefig_kwargs):
+    # Returns the <img> src: the file name relative to the output dir, or a data URI when embedding
+    savefig_kwargs = {'format': 'png', 'dpi': PNG_DPI, 'bbox_inches': 'tight', 'pil_kwargs': PNG_PIL_KWARGS, **savefig_kwargs}
+    if not embed_base64:
+        fig.savefig(png_path, **savefig_kwargs)
+        return os.path.basename(png_path)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, **savefig_kwargs)
+    data = buf.getvalue()
+    with open(png_path, 'wb') as f:
+        f.write(data)
+    return f"data:image/png;base64,{base64.b64encode(data).decode('utf-8')}"
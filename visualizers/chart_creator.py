@@ -1,24 +1,84 @@
 # visualizers/chart_creator.py
 
-import matplotlib.pyplot as plt
+import atexit
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import count, repeat
+from types import MappingProxyType
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import font_manager
+from matplotlib.figure import Figure
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
-import base64
 from pathlib import Path
+from visualizers._png import save_png
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+NUMBA_COMPLEXITY_MIN_FILES = 10000
+
+DASHBOARD_CHARTS = (
+    ('file_metrics', '_create_file_metrics_chart'),
+    ('complexity', '_create_complexity_distribution_chart'),
+    ('language_breakdown', '_create_language_breakdown_chart'),
+    ('project_health', '_create_project_health_chart'),
+)
+_worker_chart_creator = None
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _compute_complexity_numba(function_counts, class_counts, import_counts):
+        scores = np.empty(function_counts.shape[0], dtype=np.float64)
+        for i in range(function_counts.shape[0]):
+            scores[i] = function_counts[i] * 2 + class_counts[i] * 3 + import_counts[i] * 0.5
+        return scores
+
+def _compute_complexity(function_counts, class_counts, import_counts):
+    if NUMBA_AVAILABLE and function_counts.size >= NUMBA_COMPLEXITY_MIN_FILES:
+        return _compute_complexity_numba(function_counts, class_counts, import_counts)
+    return function_counts * 2 + class_counts * 3 + import_counts * 0.5
+
+def _init_chart_worker(embed_base64, session_ts):
+    # Each worker keeps one ChartCreator so its cached figures are reused across dashboards
+    global _worker_chart_creator
+    _worker_chart_creator = ChartCreator(embed_base64=embed_base64, announce=False)
+    _worker_chart_creator._session_ts = session_ts
+
+def _render_chart_worker(method_name, metrics_data, output_dir, session_id, seq):
+    return getattr(_worker_chart_creator, method_name)(metrics_data, output_dir, session_id, seq=seq)
 
 class ChartCreator:
-    def __init__(self):
-        print("📊 ChartCreator initialization complete.")
-        self.chart_style = {
+    def __init__(self, embed_base64=False, announce=True):
+        if announce:
+            print("📊 ChartCreator initialization complete.")
+        self.embed_base64 = embed_base64
+        self.chart_style = MappingProxyType({
             'figure_size': (12, 8),
-            'color_palette': ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b'],
+            'color_palette': ('#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b'),
             'background_color': '#ffffff',
             'grid_alpha': 0.3,
             'title_size': 16,
             'label_size': 12
-        }
+        })
+        self._palette = self.chart_style['color_palette']
+        if announce:
+            font_manager.findfont(font_manager.FontProperties())
+        # One Figure per chart type, cleared and redrawn on every dashboard build
+        self._figures = {}
+        self._render_lock = threading.Lock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._session_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._seq = count()
 
     def create_metrics_dashboard(self, parsing_results, output_dir="./artifacts", session_id="default"):
         print("📈 Creating comprehensive metrics dashboard...")
@@ -28,26 +88,33 @@ class ChartCreator:
             
             if not parsed_files:
                 print("⚠️ No parsed files found for metrics")
-                return None
+                return None, "⚠️ No parsed files found for metrics"
             
             metrics_data = self._extract_metrics_data(parsed_files)
+            if not metrics_data['file_names']:
+                print("⚠️ No successfully parsed files found for metrics")
+                return None, "⚠️ No successfully parsed files found for metrics"
             charts_created = {}
             
-            file_metrics_chart = self._create_file_metrics_chart(metrics_data, output_dir, session_id)
-            if file_metrics_chart:
-                charts_created['file_metrics'] = file_metrics_chart
-            
-            complexity_chart = self._create_complexity_distribution_chart(metrics_data, output_dir, session_id)
-            if complexity_chart:
-                charts_created['complexity'] = complexity_chart
-            
-            language_chart = self._create_language_breakdown_chart(metrics_data, output_dir, session_id)
-            if language_chart:
-                charts_created['language_breakdown'] = language_chart
-            
-            trend_chart = self._create_project_health_chart(metrics_data, output_dir, session_id)
-            if trend_chart:
-                charts_created['project_health'] = trend_chart
+            # Sequence numbers are allocated here, since each worker process has its own counter
+            seq = next(self._seq)
+            method_names = [method_name for _, method_name in DASHBOARD_CHARTS]
+            executor = self._get_executor()
+            try:
+                chart_results = list(executor.map(
+                    _render_chart_worker, method_names,
+                    repeat(metrics_data), repeat(output_dir), repeat(session_id), repeat(seq)
+                ))
+            except BrokenProcessPool:
+                print("⚠️ Chart worker pool broke, rendering this dashboard in-process")
+                self._discard_executor(executor)
+                chart_results = [
+                    getattr(self, method_name)(metrics_data, output_dir, session_id, seq=seq)
+                    for method_name in method_names
+                ]
+            for (chart_key, _), chart in zip(DASHBOARD_CHARTS, chart_results):
+                if chart:
+                    charts_created[chart_key] = chart
             
             print(f"✅ Created {len(charts_created)} metric charts")
             return charts_created, "✅ Metrics dashboard created successfully"
@@ -63,81 +130,116 @@ class ChartCreator:
             print("  5. Check memory availability for chart generation")
             return None, error_msg
 
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=len(DASHBOARD_CHARTS),
+                    initializer=_init_chart_worker, initargs=(self.embed_base64, self._session_ts)
+                )
+                atexit.register(self._executor.shutdown, wait=False, cancel_futures=True)
+            return self._executor
+
+    def _discard_executor(self, executor):
+        # A dead worker breaks the whole pool for good; the next dashboard starts a fresh one
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
     def _extract_metrics_data(self, parsed_files):
-        metrics = {
-            'file_names': [],
-            'function_counts': [],
-            'class_counts': [],
-            'line_counts': [],
-            'import_counts': [],
-            'complexity_scores': []
-        }
+        n = len(parsed_files)
+        file_names = [None] * n
+        function_counts = np.empty(n, dtype=np.int32)
+        class_counts = np.empty(n, dtype=np.int32)
+        line_counts = np.empty(n, dtype=np.int64)
+        import_counts = np.empty(n, dtype=np.int32)
         
+        i = 0
         for file_path, parse_data in parsed_files.items():
             if not parse_data.get('parsing_successful', False):
                 continue
             
-            file_name = Path(file_path).name
-            functions = len(parse_data.get('functions', []))
-            classes = len(parse_data.get('classes', []))
-            lines = parse_data.get('source_lines', 0)
-            imports = len(parse_data.get('imports', {}).get('standard_imports', [])) + len(parse_data.get('imports', {}).get('from_imports', []))
-            
-            complexity = functions * 2 + classes * 3 + (imports * 0.5)
-            
-            metrics['file_names'].append(file_name)
-            metrics['function_counts'].append(functions)
-            metrics['class_counts'].append(classes)
-            metrics['line_counts'].append(lines)
-            metrics['import_counts'].append(imports)
-            metrics['complexity_scores'].append(complexity)
+            imports = parse_data.get('imports') or {}
+            file_names[i] = Path(file_path).name
+            function_counts[i] = len(parse_data.get('functions', ()))
+            class_counts[i] = len(parse_data.get('classes', ()))
+            line_counts[i] = parse_data.get('source_lines', 0)
+            import_counts[i] = len(imports.get('standard_imports', ())) + len(imports.get('from_imports', ()))
+            i += 1
+        
+        function_counts, class_counts = function_counts[:i], class_counts[:i]
+        line_counts, import_counts = line_counts[:i], import_counts[:i]
         
-        return metrics
+        return {
+            'file_names': file_names[:i],
+            'function_counts': function_counts,
+            'class_counts': class_counts,
+            'line_counts': line_counts,
+            'import_counts': import_counts,
+            'complexity_scores': _compute_complexity(function_counts, class_counts, import_counts)
+        }
+
+    def _get_figure(self, name, figsize, nrows=1, ncols=1):
+        # Figure rather than pyplot keeps these out of pyplot's global figure manager
+        cached = self._figures.get(name)
+        if cached is None:
+            fig = Figure(figsize=figsize, layout='constrained')
+            cached = self._figures[name] = (fig, fig.subplots(nrows, ncols, squeeze=False))
+        else:
+            for ax in cached[1].flat:
+                ax.clear()
+        return cached
+
+    def _chart_path(self, output_dir, chart_name, seq=None):
+        if seq is None:
+            seq = next(self._seq)
+        return os.path.join(output_dir, f"{chart_name}_{self._session_ts}_{seq}.png")
 
-    def _create_file_metrics_chart(self, metrics_data, output_dir, session_id):
+    def _save_chart(self, fig, chart_path):
+        return save_png(fig, chart_path, self.embed_base64, pad_inches=0.05, facecolor='white')
+
+    def _create_file_metrics_chart(self, metrics_data, output_dir, session_id, seq=None):
         try:
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
-            fig.suptitle('Project File Metrics Overview', fontsize=self.chart_style['title_size'], fontweight='bold')
-            
-            ax1.bar(range(len(metrics_data['function_counts'])), metrics_data['function_counts'], 
-                   color=self.chart_style['color_palette'][0], alpha=0.7)
-            ax1.set_title('Functions per File')
-            ax1.set_xlabel('Files')
-            ax1.set_ylabel('Function Count')
-            ax1.grid(True, alpha=self.chart_style['grid_alpha'])
-            
-            ax2.bar(range(len(metrics_data['class_counts'])), metrics_data['class_counts'], 
-                   color=self.chart_style['color_palette'][1], alpha=0.7)
-            ax2.set_title('Classes per File')
-            ax2.set_xlabel('Files')
-            ax2.set_ylabel('Class Count')
-            ax2.grid(True, alpha=self.chart_style['grid_alpha'])
-            
-            ax3.plot(metrics_data['line_counts'], color=self.chart_style['color_palette'][2], 
-                    marker='o', linewidth=2, markersize=4)
-            ax3.set_title('Lines of Code per File')
-            ax3.set_xlabel('Files')
-            ax3.set_ylabel('Lines of Code')
-            ax3.grid(True, alpha=self.chart_style['grid_alpha'])
-            
-            ax4.scatter(metrics_data['function_counts'], metrics_data['complexity_scores'], 
-                       color=self.chart_style['color_palette'][3], alpha=0.6, s=50)
-            ax4.set_title('Complexity vs Functions')
-            ax4.set_xlabel('Function Count')
-            ax4.set_ylabel('Complexity Score')
-            ax4.grid(True, alpha=self.chart_style['grid_alpha'])
-            
-            plt.tight_layout()
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            chart_path = os.path.join(output_dir, f"file_metrics_{timestamp}.png")
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight', facecolor='white')
-            plt.close()
-            
-            with open(chart_path, 'rb') as f:
-                chart_b64 = base64.b64encode(f.read()).decode('utf-8')
-            
-            html_content = f'<img src="data:image/png;base64,{chart_b64}" style="max-width:100%; height:auto;">'
+            with self._render_lock:
+                fig, axes = self._get_figure('file_metrics', (16, 12), 2, 2)
+                (ax1, ax2), (ax3, ax4) = axes
+                fig.suptitle('Project File Metrics Overview', fontsize=self.chart_style['title_size'], fontweight='bold')
+                
+                x = np.arange(metrics_data['function_counts'].size)
+                
+                ax1.bar(x, metrics_data['function_counts'], 
+                       color=self._palette[0], alpha=0.7)
+                ax1.set_title('Functions per File')
+                ax1.set_xlabel('Files')
+                ax1.set_ylabel('Function Count')
+                ax1.grid(True, alpha=self.chart_style['grid_alpha'])
+                
+                ax2.bar(x, metrics_data['class_counts'], 
+                       color=self._palette[1], alpha=0.7)
+                ax2.set_title('Classes per File')
+                ax2.set_xlabel('Files')
+                ax2.set_ylabel('Class Count')
+                ax2.grid(True, alpha=self.chart_style['grid_alpha'])
+                
+                ax3.plot(x, metrics_data['line_counts'], color=self._palette[2], 
+                        marker='o', linewidth=2, markersize=4)
+                ax3.set_title('Lines of Code per File')
+                ax3.set_xlabel('Files')
+                ax3.set_ylabel('Lines of Code')
+                ax3.grid(True, alpha=self.chart_style['grid_alpha'])
+                
+                ax4.scatter(metrics_data['function_counts'], metrics_data['complexity_scores'], 
+                           color=self._palette[3], alpha=0.6, s=50)
+                ax4.set_title('Complexity vs Functions')
+                ax4.set_xlabel('Function Count')
+                ax4.set_ylabel('Complexity Score')
+                ax4.grid(True, alpha=self.chart_style['grid_alpha'])
+                
+                chart_path = self._chart_path(output_dir, 'file_metrics', seq)
+                img_src = self._save_chart(fig, chart_path)
+            
+            html_content = f'<img src="{img_src}" style="max-width:100%; height:auto;">'
             
             print(f"✅ File metrics chart created: {chart_path}")
             return {'html_content': html_content, 'file_path': chart_path, 'chart_type': 'file_metrics'}
@@ -146,38 +248,33 @@ class ChartCreator:
             print(f"⚠️ File metrics chart creation failed: {str(e)}")
             return None
 
-    def _create_complexity_distribution_chart(self, metrics_data, output_dir, session_id):
+    def _create_complexity_distribution_chart(self, metrics_data, output_dir, session_id, seq=None):
         try:
-            plt.figure(figsize=self.chart_style['figure_size'])
-            
             complexity_scores = metrics_data['complexity_scores']
-            if not complexity_scores:
+            if complexity_scores.size == 0:
                 print("⚠️ No complexity data available")
                 return None
             
-            plt.hist(complexity_scores, bins=min(20, len(complexity_scores)), 
-                    color=self.chart_style['color_palette'][4], alpha=0.7, edgecolor='black')
-            plt.title('Code Complexity Distribution', fontsize=self.chart_style['title_size'], fontweight='bold')
-            plt.xlabel('Complexity Score', fontsize=self.chart_style['label_size'])
-            plt.ylabel('Number of Files', fontsize=self.chart_style['label_size'])
-            plt.grid(True, alpha=self.chart_style['grid_alpha'])
-            
-            mean_complexity = np.mean(complexity_scores)
-            plt.axvline(mean_complexity, color='red', linestyle='--', linewidth=2, 
-                       label=f'Mean: {mean_complexity:.1f}')
-            plt.legend()
-            
-            plt.tight_layout()
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            chart_path = os.path.join(output_dir, f"complexity_dist_{timestamp}.png")
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight', facecolor='white')
-            plt.close()
-            
-            with open(chart_path, 'rb') as f:
-                chart_b64 = base64.b64encode(f.read()).decode('utf-8')
-            
-            html_content = f'<img src="data:image/png;base64,{chart_b64}" style="max-width:100%; height:auto;">'
+            with self._render_lock:
+                fig, axes = self._get_figure('complexity_distribution', self.chart_style['figure_size'])
+                ax = axes[0, 0]
+                
+                ax.hist(complexity_scores, bins=min(20, len(complexity_scores)), 
+                        color=self._palette[4], alpha=0.7, edgecolor='black')
+                ax.set_title('Code Complexity Distribution', fontsize=self.chart_style['title_size'], fontweight='bold')
+                ax.set_xlabel('Complexity Score', fontsize=self.chart_style['label_size'])
+                ax.set_ylabel('Number of Files', fontsize=self.chart_style['label_size'])
+                ax.grid(True, alpha=self.chart_style['grid_alpha'])
+                
+                mean_complexity = np.mean(complexity_scores)
+                ax.axvline(mean_complexity, color='red', linestyle='--', linewidth=2, 
+                           label=f'Mean: {mean_complexity:.1f}')
+                ax.legend()
+                
+                chart_path = self._chart_path(output_dir, 'complexity_dist', seq)
+                img_src = self._save_chart(fig, chart_path)
+            
+            html_content = f'<img src="{img_src}" style="max-width:100%; height:auto;">'
             
             print(f"✅ Complexity distribution chart created: {chart_path}")
             return {'html_content': html_content, 'file_path': chart_path, 'chart_type': 'complexity_distribution'}
@@ -186,37 +283,31 @@ class ChartCreator:
             print(f"⚠️ Complexity distribution chart creation failed: {str(e)}")
             return None
 
-    def _create_language_breakdown_chart(self, metrics_data, output_dir, session_id):
+    def _create_language_breakdown_chart(self, metrics_data, output_dir, session_id, seq=None):
         try:
-            file_extensions = {}
-            for file_name in metrics_data['file_names']:
-                ext = Path(file_name).suffix or '.unknown'
-                file_extensions[ext] = file_extensions.get(ext, 0) + 1
+            file_extensions = Counter(Path(file_name).suffix or '.unknown' for file_name in metrics_data['file_names'])
             
             if not file_extensions:
                 print("⚠️ No file extension data available")
                 return None
             
-            plt.figure(figsize=(10, 8))
-            
-            extensions = list(file_extensions.keys())
-            counts = list(file_extensions.values())
-            colors = self.chart_style['color_palette'][:len(extensions)]
-            
-            plt.pie(counts, labels=extensions, autopct='%1.1f%%', startangle=90, 
-                   colors=colors, explode=[0.05] * len(extensions))
-            plt.title('Project Language Breakdown', fontsize=self.chart_style['title_size'], fontweight='bold')
-            plt.axis('equal')
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            chart_path = os.path.join(output_dir, f"language_breakdown_{timestamp}.png")
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight', facecolor='white')
-            plt.close()
-            
-            with open(chart_path, 'rb') as f:
-                chart_b64 = base64.b64encode(f.read()).decode('utf-8')
-            
-            html_content = f'<img src="data:image/png;base64,{chart_b64}" style="max-width:100%; height:auto;">'
+            with self._render_lock:
+                fig, axes = self._get_figure('language_breakdown', (10, 8))
+                ax = axes[0, 0]
+                
+                extensions = list(file_extensions.keys())
+                counts = list(file_extensions.values())
+                colors = self._palette[:len(extensions)]
+                
+                ax.pie(counts, labels=extensions, autopct='%1.1f%%', startangle=90, 
+                       colors=colors, explode=[0.05] * len(extensions))
+                ax.set_title('Project Language Breakdown', fontsize=self.chart_style['title_size'], fontweight='bold')
+                ax.axis('equal')
+                
+                chart_path = self._chart_path(output_dir, 'language_breakdown', seq)
+                img_src = self._save_chart(fig, chart_path)
+            
+            html_content = f'<img src="{img_src}" style="max-width:100%; height:auto;">'
             
             print(f"✅ Language breakdown chart created: {chart_path}")
             return {'html_content': html_content, 'file_path': chart_path, 'chart_type': 'language_breakdown'}
@@ -225,40 +316,35 @@ class ChartCreator:
             print(f"⚠️ Language breakdown chart creation failed: {str(e)}")
             return None
 
-    def _create_project_health_chart(self, metrics_data, output_dir, session_id):
+    def _create_project_health_chart(self, metrics_data, output_dir, session_id, seq=None):
         try:
-            plt.figure(figsize=(14, 8))
-            
-            total_functions = sum(metrics_data['function_counts'])
-            total_classes = sum(metrics_data['class_counts'])
-            total_lines = sum(metrics_data['line_counts'])
-            avg_complexity = np.mean(metrics_data['complexity_scores']) if metrics_data['complexity_scores'] else 0
+            total_functions = metrics_data['function_counts'].sum()
+            total_classes = metrics_data['class_counts'].sum()
+            total_lines = metrics_data['line_counts'].sum()
+            avg_complexity = metrics_data['complexity_scores'].mean() if metrics_data['complexity_scores'].size else 0
             
             health_metrics = ['Functions', 'Classes', 'Lines (÷100)', 'Avg Complexity']
             health_values = [total_functions, total_classes, total_lines / 100, avg_complexity]
             
-            bars = plt.bar(health_metrics, health_values, 
-                          color=self.chart_style['color_palette'][:4], alpha=0.8)
-            
-            plt.title('Project Health Overview', fontsize=self.chart_style['title_size'], fontweight='bold')
-            plt.ylabel('Count / Score', fontsize=self.chart_style['label_size'])
-            plt.grid(True, alpha=self.chart_style['grid_alpha'])
-            
-            for bar, value in zip(bars, health_values):
-                plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(health_values) * 0.01,
-                        f'{value:.1f}', ha='center', va='bottom', fontweight='bold')
-            
-            plt.tight_layout()
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            chart_path = os.path.join(output_dir, f"project_health_{timestamp}.png")
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight', facecolor='white')
-            plt.close()
-            
-            with open(chart_path, 'rb') as f:
-                chart_b64 = base64.b64encode(f.read()).decode('utf-8')
-            
-            html_content = f'<img src="data:image/png;base64,{chart_b64}" style="max-width:100%; height:auto;">'
+            with self._render_lock:
+                fig, axes = self._get_figure('project_health', (14, 8))
+                ax = axes[0, 0]
+                
+                bars = ax.bar(health_metrics, health_values, 
+                              color=self._palette[:4], alpha=0.8)
+                
+                ax.set_title('Project Health Overview', fontsize=self.chart_style['title_size'], fontweight='bold')
+                ax.set_ylabel('Count / Score', fontsize=self.chart_style['label_size'])
+                ax.grid(True, alpha=self.chart_style['grid_alpha'])
+                
+                for bar, value in zip(bars, health_values):
+                    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(health_values) * 0.01,
+                            f'{value:.1f}', ha='center', va='bottom', fontweight='bold')
+                
+                chart_path = self._chart_path(output_dir, 'project_health', seq)
+                img_src = self._save_chart(fig, chart_path)
+            
+            html_content = f'<img src="{img_src}" style="max-width:100%; height:auto;">'
             
             print(f"✅ Project health chart created: {chart_path}")
             return {'html_content': html_content, 'file_path': chart_path, 'chart_type': 'project_health'}
@@ -267,4 +353,5 @@ class ChartCreator:
             print(f"⚠️ Project health chart creation failed: {str(e)}")
             return None
 
-print("🎯 visualizers/chart_creator.py module export ready.")
\ No newline at end of file
+if __name__ == "__main__":
+    print("🎯 visualizers/chart_creator.py module export ready.")
@@ -1,12 +1,22 @@
 # visualizers/diagram_generator.py
 
 import os
+import gc
 import time
-import base64
+import itertools
+import threading
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import font_manager
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 from datetime import datetime
 from pathlib import Path
+from visualizers._png import save_png
+
+# pyplot keeps a single global current figure, so concurrent sessions have to take turns drawing
+_PYPLOT_LOCK = threading.Lock()
 
 try:
     import pygraphviz as pgv
@@ -14,9 +24,38 @@ try:
 except ImportError:
     PYGRAPHVIZ_AVAILABLE = False
 
+def _grid_coords(count):
+    # These diagrams carry no edges, so a deterministic grid conveys as much as a force-directed layout
+    side = max(1, int(np.ceil(np.sqrt(count))))
+    index = np.arange(count)
+    return (index % side).astype(float), -(index // side).astype(float)
+
+def _grid_layout(nodes):
+    nodes = list(nodes)
+    xs, ys = _grid_coords(len(nodes))
+    return dict(zip(nodes, np.column_stack((xs, ys))))
+
+def _draw_labeled_points(names, color, node_size, alpha, font_size):
+    xs, ys = _grid_coords(len(names))
+    plt.scatter(xs, ys, c=color, s=node_size, alpha=alpha)
+    ax = plt.gca()
+    for name, x, y in zip(names, xs, ys):
+        ax.annotate(name, (x, y), fontsize=font_size, fontweight='bold', ha='center', va='center')
+
+def _is_entry_module(module_name):
+    name_lc = module_name.lower()
+    return 'main' in name_lc or 'app' in name_lc
+
+def _dot_escape(text):
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
 class DiagramGenerator:
-    def __init__(self):
+    def __init__(self, embed_base64=False):
         print("🎨 DiagramGenerator initialization complete.")
+        self.embed_base64 = embed_base64
+        # One timestamp per generator plus a sequence number, so same-second diagrams never overwrite
+        self._session_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._seq = itertools.count()
         self.color_scheme = {
             'node_colors': {
                 'module': '#4CAF50',
@@ -31,8 +70,15 @@ class DiagramGenerator:
                 'inheritance': '#E91E63'
             }
         }
+        # Pay the font lookup and first-figure setup once, before the first diagram is requested
+        font_manager.findfont(font_manager.FontProperties())
+        plt.close(plt.figure())
 
     def create_diagrams(self, parsing_results, output_dir="./artifacts", session_id="default"):
+        with _PYPLOT_LOCK:
+            return self._create_diagrams(parsing_results, output_dir, session_id)
+
+    def _create_diagrams(self, parsing_results, output_dir, session_id):
         print("🖼️ Creating architecture diagrams from parsed codebase...")
         try:
             os.makedirs(output_dir, exist_ok=True)
@@ -63,6 +109,10 @@ class DiagramGenerator:
             print("  4. Check output directory permissions")
             print("  5. Restart kernel if memory issues persist")
             return None, error_msg
+        finally:
+            # Figures abandoned on early-return or error paths stay registered with pyplot; drop them per bundle
+            plt.close('all')
+            gc.collect()
 
     def _create_module_overview(self, parsing_results, output_dir, session_id):
         print("📊 Creating module overview diagram...")
@@ -76,22 +126,10 @@ class DiagramGenerator:
             return None
 
     def _create_pygraphviz_module_diagram(self, parsing_results, output_dir, session_id):
-        A = pgv.AGraph(strict=False, directed=True)
-        A.graph_attr.update(
-            rankdir='TB',
-            fontsize='12',
-            fontname='Arial',
-            bgcolor='white',
-            size='10,8'
-        )
-        A.node_attr.update(
-            shape='box',
-            style='rounded,filled',
-            fontname='Arial',
-            fontsize='10'
-        )
-        
         parsed_files = parsing_results.get('parsed_files', {})
+        node_stmts = []
+        module_color = self.color_scheme['node_colors']['module']
+        entry_color = self.color_scheme['node_colors']['entry_point']
         
         for file_path, parse_data in parsed_files.items():
             if not parse_data.get('parsing_successful', False):
@@ -101,30 +139,39 @@ class DiagramGenerator:
             functions = len(parse_data.get('functions', []))
             classes = len(parse_data.get('classes', []))
             
-            node_color = self.color_scheme['node_colors']['module']
-            if 'main' in module_name.lower() or 'app' in module_name.lower():
-                node_color = self.color_scheme['node_colors']['entry_point']
+            node_color = entry_color if _is_entry_module(module_name) else module_color
             
-            label = f"{module_name}\\n{functions}f, {classes}c"
-            A.add_node(module_name, label=label, fillcolor=node_color)
+            name = _dot_escape(module_name)
+            node_stmts.append(f'"{name}" [label="{name}\\n{functions}f, {classes}c", fillcolor="{node_color}"];')
         
-        A.layout(prog='dot')
+        A = pgv.AGraph(string=(
+            'digraph {\n'
+            'graph [rankdir=TB, fontsize=12, fontname=Arial, bgcolor=white, size="10,8"];\n'
+            'node [shape=box, style="rounded,filled", fontname=Arial, fontsize=10];\n'
+            + '\n'.join(node_stmts) + '\n}'
+        ))
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        svg_path = os.path.join(output_dir, f"module_overview_{timestamp}.svg")
-        png_path = os.path.join(output_dir, f"module_overview_{timestamp}.png")
+        A.layout(prog='dot')
         
-        A.draw(svg_path, format='svg')
-        A.draw(png_path, format='png')
+        svg_path = self._artifact_path(output_dir, 'module_overview', 'svg')
         
-        with open(svg_path, 'r', encoding='utf-8') as f:
-            svg_content = f.read()
+        # SVG only; the PNG render was never used
+        svg_bytes = A.draw(format='svg')
+        with open(svg_path, 'wb') as f:
+            f.write(svg_bytes)
+        svg_content = svg_bytes.decode('utf-8')
         
         print(f"✅ PyGraphviz module diagram created: {svg_path}")
-        return {'svg_content': svg_content, 'svg_path': svg_path, 'png_path': png_path, 'method': 'pygraphviz'}
+        return {'svg_content': svg_content, 'svg_path': svg_path, 'method': 'pygraphviz'}
+
+    def _artifact_path(self, output_dir, name, ext):
+        return os.path.join(output_dir, f"{name}_{self._session_ts}_{next(self._seq)}.{ext}")
+
+    def _save_png(self, png_path):
+        return save_png(plt.gcf(), png_path, self.embed_base64)
 
     def _create_matplotlib_module_diagram(self, parsing_results, output_dir, session_id):
-        plt.figure(figsize=(12, 8))
+        plt.figure(figsize=(12, 8), layout='constrained')
         
         G = nx.Graph()
         parsed_files = parsing_results.get('parsed_files', {})
@@ -139,31 +186,23 @@ class DiagramGenerator:
             
             G.add_node(module_name, functions=functions, classes=classes)
         
-        pos = nx.spring_layout(G, k=2, iterations=50)
+        pos = _grid_layout(G.nodes())
         
-        node_colors = [
-            self.color_scheme['node_colors']['entry_point'] 
-            if 'main' in node.lower() or 'app' in node.lower() 
-            else self.color_scheme['node_colors']['module']
-            for node in G.nodes()
-        ]
+        module_color = self.color_scheme['node_colors']['module']
+        entry_color = self.color_scheme['node_colors']['entry_point']
+        node_colors = [entry_color if _is_entry_module(node) else module_color for node in G.nodes()]
         
         nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=2000, alpha=0.8)
         nx.draw_networkx_labels(G, pos, font_size=10, font_weight='bold')
         
         plt.title("Module Overview", fontsize=16, fontweight='bold', pad=20)
         plt.axis('off')
-        plt.tight_layout()
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        png_path = os.path.join(output_dir, f"module_overview_matplotlib_{timestamp}.png")
-        plt.savefig(png_path, dpi=300, bbox_inches='tight')
+        png_path = self._artifact_path(output_dir, 'module_overview_matplotlib', 'png')
+        img_src = self._save_png(png_path)
         plt.close()
         
-        with open(png_path, 'rb') as f:
-            png_b64 = base64.b64encode(f.read()).decode('utf-8')
-        
-        html_content = f'<img src="data:image/png;base64,{png_b64}" style="max-width:100%; height:auto;">'
+        html_content = f'<img src="{img_src}" style="max-width:100%; height:auto;">'
         
         print(f"✅ Matplotlib module diagram created: {png_path}")
         return {'html_content': html_content, 'png_path': png_path, 'method': 'matplotlib'}
@@ -171,9 +210,8 @@ class DiagramGenerator:
     def _create_class_hierarchy(self, parsing_results, output_dir, session_id):
         print("🏗️ Creating class hierarchy diagram...")
         try:
-            plt.figure(figsize=(14, 10))
-            
-            G = nx.DiGraph()
+            # dict keys keep first-seen order and drop duplicate names, as graph nodes did
+            class_names = {}
             parsed_files = parsing_results.get('parsed_files', {})
             
             for file_path, parse_data in parsed_files.items():
@@ -185,33 +223,24 @@ class DiagramGenerator:
                 
                 for class_info in classes:
                     class_name = class_info.get('name', 'Unknown')
-                    full_class_name = f"{module_name}.{class_name}"
-                    G.add_node(full_class_name, type='class', module=module_name)
+                    class_names[f"{module_name}.{class_name}"] = None
             
-            if len(G.nodes()) == 0:
+            if not class_names:
                 print("⚠️ No classes found for hierarchy diagram")
                 return None
             
-            pos = nx.spring_layout(G, k=3, iterations=50)
-            
-            nx.draw_networkx_nodes(G, pos, 
-                node_color=self.color_scheme['node_colors']['class'],
-                node_size=1500, alpha=0.8)
-            nx.draw_networkx_labels(G, pos, font_size=8, font_weight='bold')
+            plt.figure(figsize=(14, 10), layout='constrained')
+            _draw_labeled_points(list(class_names), self.color_scheme['node_colors']['class'],
+                                 node_size=1500, alpha=0.8, font_size=8)
             
             plt.title("Class Hierarchy", fontsize=16, fontweight='bold', pad=20)
             plt.axis('off')
-            plt.tight_layout()
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            png_path = os.path.join(output_dir, f"class_hierarchy_{timestamp}.png")
-            plt.savefig(png_path, dpi=300, bbox_inches='tight')
+            png_path = self._artifact_path(output_dir, 'class_hierarchy', 'png')
+            img_src = self._save_png(png_path)
             plt.close()
             
-            with open(png_path, 'rb') as f:
-                png_b64 = base64.b64encode(f.read()).decode('utf-8')
-            
-            html_content = f'<img src="data:image/png;base64,{png_b64}" style="max-width:100%; height:auto;">'
+            html_content = f'<img src="{img_src}" style="max-width:100%; height:auto;">'
             
             print(f"✅ Class hierarchy diagram created: {png_path}")
             return {'html_content': html_content, 'png_path': png_path, 'method': 'matplotlib'}
@@ -223,9 +252,7 @@ class DiagramGenerator:
     def _create_function_map(self, parsing_results, output_dir, session_id):
         print("🔧 Creating function map diagram...")
         try:
-            plt.figure(figsize=(16, 12))
-            
-            G = nx.Graph()
+            function_names = {}
             parsed_files = parsing_results.get('parsed_files', {})
             
             for file_path, parse_data in parsed_files.items():
@@ -237,33 +264,24 @@ class DiagramGenerator:
                 
                 for func_info in functions:
                     func_name = func_info.get('name', 'Unknown')
-                    full_func_name = f"{module_name}.{func_name}"
-                    G.add_node(full_func_name, type='function', module=module_name)
+                    function_names[f"{module_name}.{func_name}"] = None
             
-            if len(G.nodes()) == 0:
+            if not function_names:
                 print("⚠️ No functions found for function map")
                 return None
             
-            pos = nx.spring_layout(G, k=2, iterations=50)
-            
-            nx.draw_networkx_nodes(G, pos, 
-                node_color=self.color_scheme['node_colors']['function'],
-                node_size=800, alpha=0.7)
-            nx.draw_networkx_labels(G, pos, font_size=6, font_weight='bold')
+            plt.figure(figsize=(16, 12), layout='constrained')
+            _draw_labeled_points(list(function_names), self.color_scheme['node_colors']['function'],
+                                 node_size=800, alpha=0.7, font_size=6)
             
             plt.title("Function Map", fontsize=16, fontweight='bold', pad=20)
             plt.axis('off')
-            plt.tight_layout()
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            png_path = os.path.join(output_dir, f"function_map_{timestamp}.png")
-            plt.savefig(png_path, dpi=300, bbox_inches='tight')
+            png_path = self._artifact_path(output_dir, 'function_map', 'png')
+            img_src = self._save_png(png_path)
             plt.close()
             
-            with open(png_path, 'rb') as f:
-                png_b64 = base64.b64encode(f.read()).decode('utf-8')
-            
-            html_content = f'<img src="data:image/png;base64,{png_b64}" style="max-width:100%; height:auto;">'
+            html_content = f'<img src="{img_src}" style="max-width:100%; height:auto;">'
             
             print(f"✅ Function map diagram created: {png_path}")
             return {'html_content': html_content, 'png_path': png_path, 'method': 'matplotlib'}
@@ -272,4 +290,5 @@ class DiagramGenerator:
             print(f"⚠️ Function map diagram failed: {str(e)}")
             return None
 
-print("🎯 visualizers/diagram_generator.py module export ready.")
\ No newline at end of file
+if __name__ == "__main__":
+    print("🎯 visualizers/diagram_generator.py module export ready.")